@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""Benchmark + golden-regression harness for the hex overlays, so the engine can be
+optimized without drifting from the report numbers.
+
+Times every overlay path — res-10 fractional (CWHR13), res-9 (connectivity), res-8
+threshold (ACE / plant / linkages / freshwater) and res-10 presence (wetlands, GDE,
+SLR) — on every engine (DuckDB without rollup = the QUERIES.md method, DuckDB over the
+rollup, the NumPy kernel serial and on a process pool). Each measurement runs in a fresh
+spawned process with an empty memo cache and scratch dir, and reports feature rows/s and
+peak RSS. Then it asserts:
+
+  fixture  a small deterministic synthetic H3 mirror (real cell ids, two h0 partitions,
+           out-of-state cells, sparse and overlapping conserved units, duplicate grid
+           rows, border cells in two counties): every rollup engine equals an independent
+           NumPy reference and the QUERIES.md engine one of that method (no CA mask,
+           unweighted cells, §4's inner join), grouped by ecoregion / county its regions sum back to it and one
+           region equals the reference on that region's land alone, and each
+           documented pitfall (LEAST(NULL,1), unweighted areas, no California mask, inner
+           join) moves the answer the way it did on the real data
+  --real   the HEX_ROOT mirror: engines agree and the pitfalls move the same way; on the
+           full mirror (no --partitions) also the golden anchors — conifer woodland 33.3,
+           urban 0.9, the documented wrong values, and the QUERIES.md engine reproducing
+           reproduction_record.json's values within `match_thresholds.exact`
+
+    python scripts/bench_overlay.py                          # fixture, exits 1 on a failed check
+    python scripts/bench_overlay.py --n8 400 --workers 8     # bigger fixture for timing
+    python scripts/bench_overlay.py --real --partitions 2 --json bench.json"""
+import argparse, glob, json, os, re, resource, shutil, sys, tempfile, time
+import multiprocessing as mp
+import numpy as np
+from hexengine import BAND_CUTS, CONN_CAT, DATASETS, GROUPS, NWI_TYPES, PRESENCE10, RES8, ROOT
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RECORD = os.path.join(HERE, "..", "reproduction_record.json")
+PATHS = {"res10-frac": lambda e: e.frac10("cwhr13", "whr13num"), "res9": lambda e: e.connectivity9(),
+         "res8-threshold": lambda e: e.res8(), "presence10": lambda e: e.presence10()}
+PATH_DS = {"res10-frac": ["cwhr13"], "res9": ["connectivity"],
+           "res8-threshold": sorted({v[0] for v in RES8.values()}), "presence10": [v[0] for v in PRESENCE10.values()]}
+ENGINES = ("duckdb-legacy", "duckdb-rollup", "kernel", "kernel-pool")
+REF_TOL = 1e-6   # pp; engines vs reference differ only by float summation order
+# (name, feature: 'baseline' or a CWHR13 code, variant, documented wrong value, its tolerance,
+#  which way it moves the answer). From system-prompt.md and QUERIES.md §6.
+PITFALLS = [("LEAST(NULL,1) baseline", "baseline", {"least_null": True}, 74.0, 1.0, +1),
+            ("unweighted cell areas, conifer woodland", 32, {"weighted": False}, 32.1, 0.5, -1),
+            ("no California mask, conifer woodland", 32, {"mask": False}, 28.8, 0.5, -1),
+            ("inner join, urban", 80, {"join": "inner"}, 16.1, 0.5, +1)]
+GOLDEN = {32: 33.3, 80: 0.9}   # system-prompt.md's true values, CWHR13 code -> pct
+
+# ---- synthetic fixture ------------------------------------------------------------
+# two h0 partitions whose res-10 cells differ ~19% in area; the south one is conserved
+# more, so dropping the area term biases the answer down as it did on the real grid
+SITES = ((41.9, -123.5, 0.35), (32.6, -114.75, 0.7))   # lat, lng, share of land cells in a unit
+CODES13 = [0, 10, 20, 31, 32, 41, 42, 51, 52, 60, 70, 80, 90, 100]
+
+def fixture(root, n8=40, seed=0):
+    """Write a hive-partitioned mirror of every dataset the overlays read under `root`."""
+    import h3, pyarrow as pa, pyarrow.parquet as pq
+    rng = np.random.default_rng(seed)
+    def put(ds, h0, cols):
+        d = os.path.join(root, DATASETS[ds], f"h0={h0}")
+        os.makedirs(d, exist_ok=True)
+        pq.write_table(pa.table(cols), os.path.join(d, "data_0.parquet"))
+    u64 = lambda xs: np.array(xs, dtype=np.uint64)
+    for lat, lng, cover in SITES:
+        h0 = h3.str_to_int(h3.cell_to_parent(h3.latlng_to_cell(lat, lng, 8), 0))
+        side = int(np.ceil(np.sqrt(n8)))
+        h8s = sorted({h3.latlng_to_cell(lat + 0.05 * i, lng + 0.05 * j, 8) for i in range(side) for j in range(side)})[:n8]
+        h9s = [c for p in h8s for c in sorted(h3.cell_to_children(p, 9))]
+        h10s = [c for p in h9s for c in sorted(h3.cell_to_children(p, 10))]
+        h8, h9, h10 = u64([h3.str_to_int(c) for c in h8s]), u64([h3.str_to_int(c) for c in h9s]), u64([h3.str_to_int(c) for c in h10s])
+        p8, p9 = np.repeat(h8, 49), np.repeat(h9, 7)
+        n, H0 = len(h10), np.full(len(h10), h0, dtype=np.uint64)
+        out = rng.random(n) < 0.08                      # past the state line: in the layers, not the grid
+        cls = rng.choice(CODES13, n)
+        cls[out & (rng.random(n) < 0.5)] = 32           # conifer woodland spills out of state
+        p = np.where(cls == 80, 0.15 * cover, cover) * ~out
+        unit = rng.random(n) < p
+        two = unit & (rng.random(n) < 0.15)             # cells split between two units (sum can pass 1)
+        m = np.concatenate([np.flatnonzero(unit), np.flatnonzero(two)])
+        k = len(m)
+        g1, g2 = rng.uniform(0, 70, k), rng.uniform(0, 50, k)
+        g1[cls[m] == 80] *= 0.2
+        g1 = pa.array(g1, mask=rng.random(k) < 0.05)   # NULL GAP shares: all-NULL cells must score 0, not LEAST(NULL,1)
+        put("conserved", h0, {"h0": H0[m], "h8": p8[m], "h9": p9[m], "h10": h10[m], "Final_g1_p": g1, "Final_g2_p": g2,
+                              "Final_g3_p": rng.uniform(0, 20, k), "Final_g4_p": rng.uniform(0, 10, k)})
+        land = np.flatnonzero(~out)
+        land = np.concatenate([land, rng.choice(land, len(land) // 30)])   # the grid's duplicate rows
+        put("ecoregion", h0, {"h0": H0[land], "h8": p8[land], "h9": p9[land], "h10": h10[land],
+                              "CA_Ecoregi": np.char.add("Ecoregion ", (land % 20).astype(str))})
+        cty = np.flatnonzero(~out)
+        cty = np.concatenate([cty, rng.choice(cty, len(cty) // 10)])       # border cells, two counties
+        put("county", h0, {"h0": H0[cty], "h10": h10[cty],
+                           "NAMELSAD": np.char.add(np.char.add("County ", rng.integers(0, 9, len(cty)).astype(str)), " County")})
+        put("cwhr13", h0, {"h0": H0, "h8": p8, "h9": p9, "h10": h10, "whr13num": cls, "frac": rng.uniform(0.1, 1, n)})
+        put("cwhr", h0, {"h0": H0, "h8": p8, "h9": p9, "h10": h10, "whrnum": rng.choice([1, 3, 4, 5, 6], n),
+                         "frac": rng.uniform(0.1, 1, n)})
+        n9 = len(h9)
+        put("connectivity", h0, {"h0": np.full(n9, h0, dtype=np.uint64), "h8": np.repeat(h8, 7), "h9": h9,
+                                 "connectivity_category": rng.choice([0, 25, 29, 31, 35, 41, 45, 49], n9),
+                                 "frac": rng.uniform(0, 1, n9)})
+        s = np.flatnonzero(rng.random(n) < 0.2)
+        s = np.concatenate([s, s[:len(s) // 10]])       # a cell can carry several NWI polygons
+        put("wetlands", h0, {"h0": H0[s], "h10": h10[s], "state_code": np.where(rng.random(len(s)) < 0.9, "CA", "NV"),
+                             "WETLAND_TYPE": rng.choice(list(NWI_TYPES) + ["Lake"], len(s))})
+        for ds in ("gde", "slr"):
+            s = rng.random(n) < 0.1
+            put(ds, h0, {"h0": H0[s], "h10": h10[s]})
+        for ds in ("plant", "endp", "scmlinkage"):
+            s = rng.random(n8) < 0.3
+            put(ds, h0, {"h0": np.full(s.sum(), h0, dtype=np.uint64), "h8": h8[s]})
+        ace = {k: rng.integers(1, 6, n8) for k in ("BioRankSW", "BioRankEco", "RarRankSW", "RarRankEco")}
+        for t in ("Rept", "Amph", "Mamm", "Bird", "Plnt"):
+            for k in (f"Ntv{t}", f"Rar{t}", f"{t}Endem"): ace[k] = rng.integers(0, 50, n8)
+        put("ace", h0, {"h0": np.full(n8, h0, dtype=np.uint64), "h8": h8, **ace})
+        huc = rng.integers(0, max(n8 // 4, 1), n8)
+        put("fwa", h0, {"h0": np.full(n8, h0, dtype=np.uint64), "h8": h8, "huc12": [f"{h0}-{u}" for u in huc],
+                        "Freshwater_Species_Count": rng.integers(0, 80, max(n8 // 4, 1))[huc]})
+    return root
+
+# ---- independent NumPy reference (system-prompt.md's method, straight from the raw layers)
+def _read(root, ds, cols):
+    import pyarrow as pa, pyarrow.parquet as pq
+    ts = [pq.read_table(p, columns=cols) for p in sorted(glob.glob(os.path.join(root, DATASETS[ds], "h0=*", "data_0.parquet")))]
+    t = pa.concat_tables(ts)
+    return {c: t[c].to_numpy(zero_copy_only=False) for c in cols}
+
+def reference(root, region=None):
+    """{path: {label: [pct, Lower80, Upper20]}}: CA land grid × capped, NULL-free GAP 1+2
+    weight (and its >= 80% / >= 20% cell indicators) × h3 cell area. With region=(group,
+    name) only that region's land: each res-10 cell's area times its share in the region
+    (1 / the number of regions it is in)."""
+    import h3
+    land = _read(root, "ecoregion", ["h8", "h9", "h10"])
+    c10, first = np.unique(land["h10"].astype(np.uint64), return_index=True)
+    cons = _read(root, "conserved", ["h10", "Final_g1_p", "Final_g2_p"])
+    u, inv = np.unique(cons["h10"].astype(np.uint64), return_inverse=True)
+    wsum = np.bincount(inv, weights=np.nan_to_num((cons["Final_g1_p"] + cons["Final_g2_p"]) / 100.0))   # NULL rows add 0
+    i = np.searchsorted(u, c10).clip(0, len(u) - 1)
+    w10 = np.where(u[i] == c10, np.minimum(wsum[i], 1.0), 0.0)
+    a10 = np.array([h3.cell_area(h3.int_to_str(int(c)), "km^2") for c in c10])
+    if region:
+        ds, col = GROUPS[region[0]]
+        g = _read(root, ds, ["h10", col])
+        names = {}
+        for c, nm in set(zip(g["h10"].astype(np.uint64).tolist(), g[col].astype(str).tolist())):
+            names.setdefault(c, set()).add(nm)
+        share = np.array([(region[1] in names.get(c, ())) / max(len(names.get(c, ())), 1) for c in c10.tolist()])
+        keep = share > 0
+        c10, first, w10, a10 = c10[keep], first[keep], w10[keep], a10[keep] * share[keep]
+    W10 = np.column_stack([w10, *((w10 >= v).astype(float) for v in BAND_CUTS.values())])
+    grid = {10: (c10, W10, a10)}
+    for r in (9, 8):
+        cr, inv = np.unique(land[f"h{r}"].astype(np.uint64)[first], return_inverse=True)
+        a = np.bincount(inv, weights=a10)
+        grid[r] = (cr, np.column_stack([np.bincount(inv, weights=x * a10) / a for x in W10.T]), a)
+
+    def pct(res, cells, keys, frac=None):
+        cr, w, a = grid[res]
+        cells = cells.astype(np.uint64)
+        i = np.searchsorted(cr, cells).clip(0, len(cr) - 1)
+        ok = cr[i] == cells
+        f = np.ones(len(cells)) if frac is None else frac
+        out = {}
+        for k in np.unique(keys):
+            s = ok & (keys == k)
+            fa = f[s] * a[i[s]]
+            if fa.sum(): out[str(k)] = list(100.0 * (fa @ w[i[s]]) / fa.sum())
+        return out
+
+    f = _read(root, "cwhr13", ["h10", "whr13num", "frac"])
+    s = f["whr13num"] != 0
+    ref = {"res10-frac": pct(10, f["h10"][s], f["whr13num"][s], f["frac"][s])}
+    f = _read(root, "connectivity", ["h9", "connectivity_category", "frac"])
+    cat = np.array([next((k for k, v in CONN_CAT.items() if c in v), "") for c in f["connectivity_category"]])
+    s = cat != ""
+    ref["res9"] = pct(9, f["h9"][s], cat[s], f["frac"][s])
+    ref["presence10"] = {k: v for k, cells in presence_cells(root).items()
+                         for k, v in pct(10, cells, np.full(len(cells), k)).items()}
+    ref["res8-threshold"] = {k: v for k, cells in res8_cells(root).items()
+                             for k, v in pct(8, cells, np.full(len(cells), k)).items()}
+    return ref
+
+def presence_cells(root):
+    """{key: its distinct res-10 cells} of every PRESENCE10 feature."""
+    out = {}
+    for k, (ds, filters) in PRESENCE10.items():
+        cols = ["h10"] + [c for c, _, _ in filters or ()]
+        f = _read(root, ds, cols)
+        s = np.ones(len(f["h10"]), bool)
+        for c, op, v in filters or ():
+            s &= np.isin(f[c], list(v)) if op == "in" else f[c] == v
+        out[k] = np.unique(f["h10"][s].astype(np.uint64))
+    return out
+
+def res8_cells(root):
+    """{key: its distinct res-8 cells} of every RES8 presence / threshold feature."""
+    out = {}
+    for k, (ds, col, rule) in RES8.items():
+        f = _read(root, ds, ["h8"] + ([col] if col else []) + ([rule[2]] if rule and len(rule) > 2 else []))
+        if rule is None: s = np.ones(len(f["h8"]), bool)
+        elif rule[0] == "eq": s = f[col] == rule[1]
+        else:
+            v = f[col].astype(float)
+            if len(rule) > 2:
+                pairs = np.unique(np.stack([f[rule[2]].astype(str), f[col].astype(str)]), axis=1)
+                v = pairs[1].astype(float)
+            s = f[col].astype(float) >= np.quantile(v, rule[1])
+        out[k] = np.unique(f["h8"][s].astype(np.uint64))
+    return out
+
+def legacy_reference(root):
+    """{path: {label: [pct, Lower80, Upper20]}} by the QUERIES.md method the duckdb-legacy
+    engine runs: raw feature rows (no CA mask), unweighted cells, the summed per-cell GAP
+    1+2 share (NULL rows add 0); res-10 fractions uncapped, presence capped at 1, res-9
+    §4's inner join on conserved cells with LEAST(w, 1), res-8 the weight sum ÷ the
+    cell's CWHR13 land-cell count."""
+    cons = _read(root, "conserved", ["h8", "h9", "h10", "Final_g1_p", "Final_g2_p"])
+    u, first, inv = np.unique(cons["h10"].astype(np.uint64), return_index=True, return_inverse=True)
+    w = np.bincount(inv, weights=np.nan_to_num((cons["Final_g1_p"] + cons["Final_g2_p"]) / 100.0))
+    W = np.column_stack([w, *((w >= v).astype(float) for v in BAND_CUTS.values())])
+    def per(r):   # conserved res-10 cells summed per res-r parent
+        cr, i = np.unique(cons[f"h{r}"].astype(np.uint64)[first], return_inverse=True)
+        return cr, np.column_stack([np.bincount(i, weights=x) for x in W.T])
+    def at(cr, X, cells):   # (cells with a conserved row, their weights; 0 elsewhere)
+        cells = cells.astype(np.uint64)
+        i = np.searchsorted(cr, cells).clip(0, len(cr) - 1)
+        ok = cr[i] == cells
+        return ok, np.where(ok[:, None], X[i], 0.0)
+    def pct(keys, num, den):
+        return {str(k): list(100.0 * num[keys == k].sum(0) / den[keys == k].sum())
+                for k in np.unique(keys) if den[keys == k].sum()}
+    cap = lambda X: np.column_stack([np.minimum(X[:, 0], 1.0), X[:, 1:]])
+
+    f = _read(root, "cwhr13", ["h8", "h10", "whr13num", "frac"])
+    s = f["whr13num"] != 0
+    _, X = at(u, W, f["h10"][s])
+    ref = {"res10-frac": pct(f["whr13num"][s], f["frac"][s, None] * X, f["frac"][s])}
+    c8, n8 = np.unique(np.unique(np.stack([f["h8"][s], f["h10"][s]]).astype(np.uint64), axis=1)[0], return_counts=True)
+    f = _read(root, "connectivity", ["h9", "connectivity_category", "frac"])
+    cat = np.array([next((k for k, v in CONN_CAT.items() if c in v), "") for c in f["connectivity_category"]])
+    c9, S9 = per(9)
+    ok, X = at(c9, S9 / 7.0, f["h9"])
+    s = (cat != "") & ok
+    ref["res9"] = pct(cat[s], f["frac"][s, None] * cap(X[s]), f["frac"][s])
+    ref["presence10"] = {}
+    for k, cells in presence_cells(root).items():
+        _, X = at(u, W, cells)
+        ref["presence10"].update(pct(np.full(len(cells), k), cap(X), np.ones(len(cells))))
+    ref["res8-threshold"] = {}
+    c8w, S8 = per(8)
+    for k, cells in res8_cells(root).items():
+        _, X = at(c8w, S8, cells)
+        _, n = at(c8, n8[:, None].astype(float), cells)
+        ref["res8-threshold"].update(pct(np.full(len(cells), k), X, n[:, 0]))
+    return ref
+
+# ---- the pitfalls, as the SQL people actually wrote ---------------------------------
+def overlay_sql(con, root, feature, mask=True, weighted=True, join="left", least_null=False):
+    """pct conserved of a CWHR13 class (or frac=1 over the land grid: 'baseline'), with
+    the correct method's steps switched off one at a time."""
+    src = lambda ds: f"read_parquet('{os.path.join(root, DATASETS[ds])}/h0=*/data_0.parquet')"
+    cons = f"SELECT h10, SUM((Final_g1_p+Final_g2_p)/100.0) AS w FROM {src('conserved')} GROUP BY h10"
+    land = f"SELECT DISTINCT h10 FROM {src('ecoregion')}"
+    feat = (f"SELECT h10, 1.0 AS frac FROM ({land})" if feature == "baseline" else
+            f"SELECT h10, frac FROM {src('cwhr13')} WHERE whr13num = {feature}")
+    w = "LEAST(c.w, 1.0)" if least_null else "LEAST(COALESCE(c.w, 0), 1.0)"
+    a = "h3_cell_area(f.h10::UBIGINT, 'km^2')" if weighted else "1.0"
+    q = (f"SELECT 100.0*SUM(f.frac*{w}*{a})/SUM(f.frac*{a}) FROM ({feat}) f "
+         + (f"JOIN ({land}) m USING (h10) " if mask and feature != "baseline" else "")
+         + f"{'LEFT ' if join == 'left' else ''}JOIN ({cons}) c USING (h10)")
+    return con.execute(q).fetchone()[0]
+
+# ---- measurement ------------------------------------------------------------------
+def _measure(q, engine, path, root, rollup, workers, tmp):
+    os.environ["SCRATCH"] = os.path.join(tmp, "scratch")
+    from hexengine import Engine
+    cache = os.path.join(tmp, "cache")
+    if engine.startswith("kernel"):
+        from hexjoin import KernelEngine
+        e = KernelEngine(workers=workers if engine == "kernel-pool" else None, root=root, cache=cache, rollup=rollup)
+    else:
+        e = Engine(root=root, cache=cache, rollup="" if engine == "duckdb-legacy" else rollup)
+    t0 = time.perf_counter()
+    out = {"rollup": lambda: __import__("rollup").build(root=root, out=rollup, force=True)}.get(path, lambda: PATHS[path](e))()
+    dt = time.perf_counter() - t0
+    peak = max(resource.getrusage(r).ru_maxrss for r in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+    q.put({"seconds": dt, "peak_mb": peak / 1024, "result": out if isinstance(out, dict) else None})
+
+def measure(engine, path, root, rollup, workers):
+    """One (engine, path) in a fresh spawned process with an empty cache."""
+    tmp = tempfile.mkdtemp(prefix="bench-")
+    try:
+        ctx = mp.get_context("spawn")
+        q = ctx.Queue()
+        p = ctx.Process(target=_measure, args=(q, engine, path, root, rollup, workers, tmp))
+        p.start()
+        r = q.get()
+        p.join()
+        return r
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def grouped(root, rollup, by, paths, ref, region, rref):
+    """(engine, max |Δ| vs `ref` of the regions summed, max |Δ| of `region` alone vs `rref`,
+    (label, region) cells, seconds) per rollup engine, each one grouped pass per path."""
+    from hexengine import Engine
+    from hexjoin import KernelEngine
+    out = []
+    for name, make in (("duckdb-rollup", Engine), ("kernel", KernelEngine)):
+        tmp = tempfile.mkdtemp(prefix="bench-")
+        try:
+            e = make(root=root, cache=tmp, rollup=rollup, by=by)
+            t0, d, d1, n = time.perf_counter(), 0.0, 0.0, 0
+            for path in paths:
+                res = PATHS[path](e)
+                tot = {k: np.sum([v for v in regions.values()], axis=0) for k, regions in res.items() if regions}
+                n += sum(len(r) for r in res.values())
+                got = pcts(tot)
+                d = max([d] + [float(np.max(np.abs(np.subtract(got.get(k, np.nan), x)))) for k, x in ref[path].items()])
+                one = pcts({k: regions[region] for k, regions in res.items() if region in regions})
+                d1 = max([d1] + [float(np.max(np.abs(np.subtract(one.get(k, np.nan), x)))) for k, x in rref[path].items()]
+                         + [np.inf for k in one if k not in rref[path]])
+            out.append((name, d, d1, n, time.perf_counter() - t0))
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+    return out
+
+def rows(root, datasets):
+    import pyarrow.parquet as pq
+    return sum(pq.ParquetFile(p).metadata.num_rows for ds in datasets
+               for p in glob.glob(os.path.join(root, DATASETS[ds], "h0=*", "data_0.parquet")))
+
+def subsample(src, dest, n):
+    """A mirror of the first n California-grid h0 partitions of every dataset, as symlinks."""
+    parts = sorted(os.path.basename(os.path.dirname(p)) for p in
+                   glob.glob(os.path.join(src, DATASETS["ecoregion"], "h0=*", "data_0.parquet")))[:n]
+    for ds, d in DATASETS.items():
+        for part in parts:
+            f = os.path.join(src, d, part, "data_0.parquet")
+            if os.path.exists(f):
+                os.makedirs(os.path.join(dest, d, part), exist_ok=True)
+                os.symlink(os.path.abspath(f), os.path.join(dest, d, part, "data_0.parquet"))
+    return dest, parts
+
+def pcts(result):
+    """{label: [pct, Lower80, Upper20]} of an engine result."""
+    return {str(k): [100.0 * (n or 0) / v[1] for n in (v[0], *v[2:])] for k, v in result.items() if v[1]}
+
+def recorded():
+    """{(path, label): recorded pct} for the reproduction_record.json entries these paths cover,
+    and the match thresholds (pp) it classifies with."""
+    with open(RECORD) as f: rec = json.load(f)
+    th = {k: float(re.search(r"[\d.]+", v).group()) for k, v in rec["match_thresholds"].items()}
+    out = {}
+    for e in rec["reproductions"]:
+        i, v = e["id"], e.get("reproduced")
+        if not isinstance(v, (int, float)): continue
+        if i.startswith("h13r_"): out[("res10-frac", i[5:])] = v
+        elif i in ("conn_chn", "conn_int", "conn_diff"): out[("res9", i[5:])] = v
+        elif i == "conn_scmlinkage": out[("res8-threshold", "scmlinkage")] = v
+        elif i in ("plant", "endp", "fwa_rich") or i.startswith("ace_"): out[("res8-threshold", i.removeprefix("ace_"))] = v
+        elif i in PRESENCE10: out[("presence10", i)] = v
+    return out, th
+
+# ---- the run ------------------------------------------------------------------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--real", action="store_true", help="benchmark the HEX_ROOT mirror instead of a fixture")
+    ap.add_argument("--partitions", type=int, help="--real: only the first N h0 partitions (skips the golden anchors)")
+    ap.add_argument("--n8", type=int, default=40, help="fixture: res-8 cells per h0 partition (49 res-10 each)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    ap.add_argument("--engines", default=",".join(ENGINES))
+    ap.add_argument("--paths", default=",".join(PATHS))
+    ap.add_argument("--json", help="write timings + checks here")
+    a = ap.parse_args(argv)
+    engines, paths = a.engines.split(","), a.paths.split(",")
+    work = tempfile.mkdtemp(prefix="bench-overlay-")
+    checks = []
+    def check(name, ok, detail=""):
+        checks.append({"check": name, "ok": bool(ok), "detail": detail})
+        print(f"  {'ok  ' if ok else 'FAIL'} {name}" + (f"  ({detail})" if detail else ""))
+    try:
+        if a.real:
+            root, parts = (subsample(ROOT, os.path.join(work, "hex"), a.partitions) if a.partitions
+                           else (ROOT, None))
+            label = f"HEX_ROOT={ROOT}" + (f", {len(parts)} partition(s)" if parts else ", full mirror")
+        else:
+            root = fixture(os.path.join(work, "hex"), a.n8, a.seed)
+            label = f"synthetic fixture, n8={a.n8}, seed={a.seed}"
+        rollup = os.path.join(work, "rollup")
+        print(f"# overlay benchmark — {label}\n")
+        runs = [dict(engine="rollup.py", path="rollup", rows=rows(root, ["ecoregion", "conserved"]),
+                     **measure("duckdb-rollup", "rollup", root, rollup, a.workers))]
+        for path in paths:
+            n = rows(root, PATH_DS[path])
+            for eng in engines:
+                runs.append(dict(engine=eng if eng != "kernel-pool" else f"kernel-pool×{a.workers}", path=path,
+                                 rows=n, **measure(eng, path, root, rollup, a.workers)))
+        print("| path | engine | feature rows | seconds | rows/s | peak RSS |\n|--|--|--:|--:|--:|--:|")
+        for r in runs:
+            print(f"| {r['path']} | {r['engine']} | {r['rows']:,} | {r['seconds']:.3f} | "
+                  f"{r['rows'] / r['seconds']:,.0f} | {r['peak_mb']:.0f} MB |")
+        print("\npeak RSS is the whole measuring process (interpreter + DuckDB / pyarrow), workers included.\n")
+
+        got = {(r["path"], r["engine"]): pcts(r["result"]) for r in runs if r["result"] is not None}
+        rollup_engines = [e for e in {r["engine"] for r in runs} if e not in ("duckdb-legacy", "rollup.py")]
+        from hexengine import connect
+        con = connect()
+        sql = lambda feature, **kw: overlay_sql(con, root, feature, **kw)
+        print("## checks")
+        if not a.real:
+            ref, legacy = reference(root), legacy_reference(root)
+            for (path, eng), v in sorted(got.items()):
+                want = legacy if eng == "duckdb-legacy" else ref
+                d = max((np.max(np.abs(np.subtract(v.get(k, np.nan), x))) for k, x in want[path].items()), default=0.0)
+                d = d if set(v) <= set(want[path]) else np.inf
+                check(f"{path} {eng} == {'QUERIES.md ' if want is legacy else ''}NumPy reference", d <= REF_TOL,
+                      f"max |Δ| {d:.2g} pp over {len(want[path])} labels × point, Lower80, Upper20")
+            for by in GROUPS:
+                with open(os.path.join(rollup, "_groups.json")) as f: region = json.load(f)[by][0]
+                rref = reference(root, (by, region))
+                for eng, d, d1, n, dt in grouped(root, rollup, by, paths, ref, region, rref):
+                    check(f"by {by}: {eng} regions sum to the NumPy reference", d <= REF_TOL,
+                          f"max |Δ| {d:.2g} pp, {n} (label, region) cells, {dt:.2f}s")
+                    check(f"by {by}: {eng} '{region}' == NumPy reference on its land cells", d1 <= REF_TOL,
+                          f"max |Δ| {d1:.2g} pp over {sum(map(len, rref.values()))} labels")
+            for code in GOLDEN:
+                d = abs(sql(code) - ref["res10-frac"][str(code)][0])
+                check(f"corrected SQL == NumPy reference, CWHR13 {code}", d <= REF_TOL, f"|Δ| {d:.2g} pp")
+        else:
+            base = {(p, e): v for (p, e), v in got.items() if e in rollup_engines}
+            for path in paths:
+                vs = [v for (p, _), v in base.items() if p == path]
+                d = max((np.max(np.abs(np.subtract(x[k], vs[0][k]))) for x in vs[1:] for k in vs[0]), default=0.0)
+                check(f"{path}: {len(vs)} rollup engines agree", d <= REF_TOL, f"max |Δ| {d:.2g} pp")
+        for name, feature, variant, wrong, tol, sign in PITFALLS:
+            right, bad = sql(feature), sql(feature, **variant)
+            check(f"pitfall {name} moves the answer {'up' if sign > 0 else 'down'}", sign * (bad - right) > 0,
+                  f"{bad:.2f} vs {right:.2f}")
+            if a.real and not a.partitions:
+                check(f"pitfall {name} reproduces the documented {wrong}", abs(bad - wrong) <= tol, f"{bad:.2f}")
+        if a.real and not a.partitions:
+            rec, th = recorded()
+            for code, true in GOLDEN.items():
+                for (p, e), v in got.items():
+                    if p == "res10-frac" and e in rollup_engines:
+                        check(f"golden CWHR13 {code} = {true}, {e}", abs(v[str(code)][0] - true) <= th["exact"], f"{v[str(code)][0]:.2f}")
+            legacy = {p: v for (p, e), v in got.items() if e == "duckdb-legacy"}
+            for (p, k), v in sorted(rec.items()):
+                if p in legacy and k in legacy[p]:
+                    check(f"QUERIES.md engine reproduces recorded {p} {k} = {v}",
+                          abs(round(legacy[p][k][0], 2) - v) <= th["exact"], f"{legacy[p][k][0]:.2f}")
+        failed = [c for c in checks if not c["ok"]]
+        print(f"\n{len(checks) - len(failed)}/{len(checks)} checks passed")
+        if a.json:
+            with open(a.json, "w") as f:
+                json.dump({"target": label, "cpus": os.cpu_count(), "workers": a.workers, "python": sys.version.split()[0],
+                           "runs": [{k: v for k, v in r.items() if k != "result"} for r in runs], "checks": checks}, f, indent=1)
+        return 1 if failed else 0
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
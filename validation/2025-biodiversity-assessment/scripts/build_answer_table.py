@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Materialize the assessment's canonical statistics as one small lookup table.
+
+Every statistic in extraction_record.json becomes one row keyed by
+(feature_key, group, metric) — the prose statistics (land characterization, network
+climate/disturbance) by their semantic key, e.g. acres_needed_30pct — with
+the report's Disc value and its Lower80 / Upper20 band. Written twice, same rows:
+
+    answer_table.parquet   sorted by key; what the agent reads in one query through the
+                           MCP tool (DuckDB read_parquet over HTTPS), published to the
+                           project bucket as answer_table-<record sha1>.parquet
+    answer_table.sqlite    primary-key + label indexes, for scripts and `lookup()`
+
+    python scripts/build_answer_table.py
+    python scripts/build_answer_table.py --lookup DESERT_SHR     # or any label words
+
+The deployed prompt pins one published copy, never a branch: after a rebuild, upload the
+file under the printed versioned name and point system-prompt.md at it (the build warns
+while the prompt still names another version). Objects are never overwritten.
+
+The full hex-overlay path stays the way to answer anything not in the table."""
+import hashlib, json, os, sqlite3, sys
+
+RECORD = "extraction_record.json"
+OUT = "answer_table"
+BUCKET = "public-ca30x30/biodiversity-assessment-2025"
+PUBLIC = "https://s3-west.nrp-nautilus.io/" + BUCKET
+PROMPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "system-prompt.md")
+COLUMNS = [("feature_key", "TEXT"), ("grp", "TEXT"), ("metric", "TEXT"), ("stat_id", "TEXT"),
+           ("label", "TEXT"), ("definition", "TEXT"), ("unit", "TEXT"), ("disc", "REAL"),
+           ("lower80", "REAL"), ("upper20", "REAL"), ("band_note", "TEXT"), ("gap34_pct", "REAL"),
+           ("nonconserved_pct", "REAL"), ("source", "TEXT")]
+
+def rows(record):
+    out = []
+    for e in record["statistics"]:
+        unc = e.get("uncertainty")
+        band = unc if isinstance(unc, list) and len(unc) == 2 else [None, None]
+        out.append({"feature_key": e.get("feature_key") or e["id"], "grp": e["group"], "metric": e["metric"],
+                    "stat_id": e["id"], "label": e["label"], "definition": e.get("definition"),
+                    "unit": "acres" if e["metric"] == "acres" else "percent", "disc": e.get("reported_value"),
+                    "lower80": band[0], "upper20": band[1], "band_note": unc if isinstance(unc, str) else None,
+                    "gap34_pct": e.get("gap34_pct"), "nonconserved_pct": e.get("nonconserved_pct"),
+                    "source": e.get("source")})
+    out.sort(key=lambda r: (r["feature_key"], r["grp"], r["metric"]))
+    keys = [(r["feature_key"], r["grp"], r["metric"]) for r in out]
+    dup = {k for k in keys if keys.count(k) > 1}
+    if dup: raise ValueError(f"duplicate (feature_key, group, metric): {sorted(dup)}")
+    return out
+
+def write_sqlite(path, table, digest):
+    tmp = path + ".tmp"
+    if os.path.exists(tmp): os.remove(tmp)
+    db = sqlite3.connect(tmp)
+    db.execute(f"CREATE TABLE answers ({', '.join(f'{c} {t}' for c, t in COLUMNS)}, "
+               "PRIMARY KEY (feature_key, grp, metric))")
+    db.execute("CREATE INDEX answers_label ON answers (label COLLATE NOCASE)")
+    db.execute("CREATE INDEX answers_stat ON answers (stat_id)")
+    db.executemany(f"INSERT INTO answers VALUES ({', '.join('?' * len(COLUMNS))})",
+                   [tuple(r[c] for c, _ in COLUMNS) for r in table])
+    db.execute("CREATE TABLE meta (k TEXT PRIMARY KEY, v TEXT)")
+    db.executemany("INSERT INTO meta VALUES (?,?)", [("source", RECORD), ("source_sha1", digest), ("rows", str(len(table)))])
+    db.commit(); db.close()
+    os.replace(tmp, path)
+
+def write_parquet(path, table, digest):
+    try:
+        import pyarrow as pa, pyarrow.parquet as pq
+    except ImportError:
+        print("  pyarrow not installed: skipped", path); return
+    types = {"TEXT": pa.string(), "REAL": pa.float64()}
+    schema = pa.schema([(c, types[t]) for c, t in COLUMNS],
+                       metadata={"source": RECORD, "source_sha1": digest})
+    t = pa.Table.from_pylist(table, schema=schema)
+    # dictionary-encode the repetitive columns; one row group, it's ~150 rows
+    pq.write_table(t, path, use_dictionary=["grp", "metric", "unit", "source"], compression="zstd")
+
+def build(record=RECORD, out=OUT):
+    with open(record, "rb") as f: raw = f.read()
+    digest = hashlib.sha1(raw).hexdigest()[:16]
+    table = rows(json.loads(raw))
+    write_sqlite(out + ".sqlite", table, digest)
+    write_parquet(out + ".parquet", table, digest)
+    print(f"{out}.{{sqlite,parquet}}: {len(table)} statistics from {record} ({digest})")
+    url = f"{PUBLIC}/{os.path.basename(out)}-{digest}.parquet"
+    try:
+        with open(PROMPT) as f: pinned = url in f.read()
+    except OSError: pinned = True
+    if not pinned:
+        print(f"  system-prompt.md reads another version: publish with\n"
+              f"    aws s3 cp {out}.parquet s3://{BUCKET}/{os.path.basename(out)}-{digest}.parquet\n"
+              f"  and point it at {url}")
+    return table
+
+def lookup(q, path=OUT + ".sqlite"):
+    """Rows whose feature_key or stat_id is `q`, else whose label contains every word of `q`."""
+    db = sqlite3.connect(path); db.row_factory = sqlite3.Row
+    hits = db.execute("SELECT * FROM answers WHERE feature_key = ? OR stat_id = ?", (q, q)).fetchall()
+    if not hits:
+        words = q.split()
+        hits = db.execute("SELECT * FROM answers WHERE " + " AND ".join(["label LIKE ?"] * len(words)),
+                          [f"%{w}%" for w in words]).fetchall() if words else []
+    return [dict(r) for r in hits]
+
+if __name__ == "__main__":
+    if "--lookup" in sys.argv:
+        for r in lookup(" ".join(sys.argv[sys.argv.index("--lookup") + 1:])):
+            band = f" [{r['lower80']}, {r['upper20']}]" if r["lower80"] is not None else ""
+            print(f"{r['feature_key']:<12} {r['grp']:<48} {r['metric']:<18} {r['disc']}{band}  {r['label']}")
+    else:
+        build()
@@ -1,21 +1,13 @@
 #!/usr/bin/env python3
 """Build extraction_record.json (record #1) and reproduction_record.json (record #2)
-for the CBN 2025 Biodiversity Assessment draft report."""
-import csv, json, os
-
-CSVDIR = "csvs/Result_CSVs_2025data"
-
-def load(name):
-    """Return dict feature_key -> row dict from a featureGAPSummary CSV."""
-    path = os.path.join(CSVDIR, f"featureGAPSummary_{name}.csv")
-    out = {}
-    with open(path) as f:
-        r = csv.DictReader(f)
-        first = r.fieldnames[0]
-        for row in r:
-            key = row[first]
-            out[key] = row
-    return out
+for the CBN 2025 Biodiversity Assessment draft report.
+
+Statistic ids are pinned per (group, feature_key) in extraction_record.ids.json: a new
+statistic gets the next unused S### and a removed one retires its id, so adding or
+dropping a statistic never renumbers the others (or invalidates their incremental deps)."""
+import json
+from summaries import load
+from incremental import Record
 
 def f2(x):
     try: return round(float(x), 2)
@@ -74,43 +66,53 @@ WHR13_LABEL = {
  "WATER":"Water","AGRICULTUR":"Agriculture","HARDWOOD_W":"Hardwood Woodland",
  "CONIFER_WO":"Conifer Woodland","DESERT_SHR":"Desert Shrub","DESERT_WOO":"Desert Woodland"}
 
+# Incremental: an entry whose source CSV row(s) and constants are unchanged is reused
+# from the existing record (see incremental.py); `src` names the (csv, feature_key) rows.
+rec = Record("extraction_record.json", "statistics", script=__file__)
 stats = []
-sid = 0
-def add(**kw):
-    global sid; sid += 1
-    kw = {"id": f"S{sid:03d}", **kw}
-    stats.append(kw)
+IDS = "extraction_record.ids.json"
+try:
+    with open(IDS) as f: ids = json.load(f)
+except (OSError, ValueError):   # first run: pin the ids the record already has
+    ids = {f"{e['group']}|{e['feature_key']}": e["id"] for e in rec.old.values() if e.get("feature_key")}
+def add(src=(), **kw):
+    k = f"{kw['group']}|{kw['feature_key']}"
+    if k not in ids: ids[k] = f"S{max((int(v[1:]) for v in ids.values()), default=0) + 1:03d}"
+    eid = ids[k]
+    stats.append(rec.put(eid, lambda: {"id": eid, **kw}, src=src, const=kw))
 
 # ---- A. Headline / land characterization (prose) ------------------------
-add(group="Land characterization", label="% of California in 30x30 Conservation Areas",
+# prose statistics have no CSV key: their feature_key is a semantic name, stable across
+# vintages, which the reproduction record and the records.arrow index pair on
+add(group="Land characterization", feature_key="pct_ca_gap12", label="% of California in 30x30 Conservation Areas",
     definition="Percent of California's land area classified GAP 1+2 (durably protected for biodiversity), proportional estimate. Denominator = official CA area (~101.5M ac).",
     metric="percent_of_CA", reported_value=26.1, uncertainty=None,
     source="Exec summary / p.'Where Do We Stand' / Land Characterization; = CNRA 2025 progress report")
-add(group="Land characterization", label="% of California in other conserved/public/unknown lands (GAP 3+4)",
+add(group="Land characterization", feature_key="pct_ca_gap34", label="% of California in other conserved/public/unknown lands (GAP 3+4)",
     definition="Percent of CA land classified GAP 3 or GAP 4 (other conservation, public, or unknown status).",
     metric="percent_of_CA", reported_value=25.5, uncertainty=None, source="Land Characterization")
-add(group="Land characterization", label="% of California non-conserved",
+add(group="Land characterization", feature_key="pct_ca_nonconserved", label="% of California non-conserved",
     definition="Percent of CA land outside any conservation-area unit (private unmanaged + DOD).",
     metric="percent_of_CA", reported_value=48.4, uncertainty=None, source="Land Characterization")
-add(group="Land characterization", label="Official 2025 30x30 Conservation Area acreage (GAP 1+2)",
+add(group="Land characterization", feature_key="gap12_acres", label="Official 2025 30x30 Conservation Area acreage (GAP 1+2)",
     definition="Total statewide GAP 1+2 conserved acres in the 2025 Conserved Areas dataset.",
     metric="acres", reported_value=26471461, uncertainty=None, source="Appendix B (Table S2 denominator)")
-add(group="Land characterization", label="Acreage increase since 2022",
+add(group="Land characterization", feature_key="acreage_increase_since_2022", label="Acreage increase since 2022",
     definition="Net new GAP 1+2 acreage added 2022->2025.",
     metric="acres", reported_value=2400000, uncertainty="stated as '2.4M' (exec) and 'roughly 2.5M' (conclusion)",
     source="Exec summary / Conclusion")
-add(group="Land characterization", label="Acreage still needed to reach 30%",
+add(group="Land characterization", feature_key="acres_needed_30pct", label="Acreage still needed to reach 30%",
     definition="Additional GAP 1+2 acres required to hit 30% of CA.",
     metric="acres", reported_value=4000000, uncertainty="stated as 'over 4M' / 'nearly 4M'", source="Exec summary / Conclusion")
 
 # ---- D. Climate & disturbance of the network (prose, %network) ----------
-add(group="Network climate/disturbance", label="Network projected climate-stressed by mid-century",
+add(group="Network climate/disturbance", feature_key="network_climate_stressed", label="Network projected climate-stressed by mid-century",
     definition="% of the 30x30 network's natural vegetation projected to be stressed by mid-century climate change (Thorne et al. 2016).",
     metric="percent_of_network", reported_value=32.0, uncertainty=None, source="Network Composition (prose); miroc %network")
-add(group="Network climate/disturbance", label="Network at risk from sea-level rise",
+add(group="Network climate/disturbance", feature_key="network_slr_risk", label="Network at risk from sea-level rise",
     definition="% of the 30x30 network at risk from sea-level rise (NOAA 5 ft).",
     metric="percent_of_network", reported_value=0.5, uncertainty=None, source="Network Composition (prose); slr %network")
-add(group="Network climate/disturbance", label="Network burned in past decade",
+add(group="Network climate/disturbance", feature_key="network_burned_past_decade", label="Network burned in past decade",
     definition="% of the 30x30 network burned by wildfire in the past decade (CAL FIRE).",
     metric="percent_of_network", reported_value=14.0, uncertainty=None, source="Network Composition (prose); fire %network")
 
@@ -118,7 +120,7 @@ add(group="Network climate/disturbance", label="Network burned in past decade",
 eco = load("ecoregion_percentNetwork")
 for k,row in eco.items():
     if k in ("Network Total",): continue
-    add(group="Network composition: ecoregion", feature_key=k, label=f"{k} share of 30x30 network",
+    add(src=[("ecoregion_percentNetwork",k)], group="Network composition: ecoregion", feature_key=k, label=f"{k} share of 30x30 network",
         definition=f"Proportional % of the 30x30 network composed of the {k} ecoregion.",
         metric="percent_of_network", reported_value=f2(row["Disc"]),
         uncertainty=[f2(row["Lower80"]), f2(row["Upper20"])], source="Figure 6b / ecoregion %network")
@@ -127,7 +129,7 @@ for k,row in eco.items():
 h13n = load("WHR13NAME_percentNetwork")
 for k,row in h13n.items():
     if k=="Network Total": continue
-    add(group="Network composition: major habitat", feature_key=k, label=f"{WHR13_LABEL[k]} share of 30x30 network",
+    add(src=[("WHR13NAME_percentNetwork",k)], group="Network composition: major habitat", feature_key=k, label=f"{WHR13_LABEL[k]} share of 30x30 network",
         definition=f"Proportional % of the 30x30 network composed of FVEG CWHR13 major habitat '{WHR13_LABEL[k]}'.",
         metric="percent_of_network", reported_value=f2(row["Disc"]),
         uncertainty=[f2(row["Lower80"]), f2(row["Upper20"])], source="Figure 7b / WHR13 %network")
@@ -136,7 +138,7 @@ for k,row in h13n.items():
 h13f = load("WHR13NAME_percentFeature")
 for k,row in h13f.items():
     if k=="Network Total": continue
-    add(group="Representation: major habitat", feature_key=k, label=f"{WHR13_LABEL[k]} conserved in 30x30",
+    add(src=[("WHR13NAME_percentFeature",k)], group="Representation: major habitat", feature_key=k, label=f"{WHR13_LABEL[k]} conserved in 30x30",
         definition=f"Proportional % of the statewide extent of FVEG CWHR13 '{WHR13_LABEL[k]}' within 30x30 Conservation Areas.",
         metric="percent_of_feature", reported_value=f2(row["Disc"]),
         uncertainty=[f2(row["Lower80"]), f2(row["Upper20"])],
@@ -147,7 +149,7 @@ whrt = load("WHRTYPE_percentFeature")
 for k,row in whrt.items():
     if k=="Network Total": continue
     lbl = row.get("WHRNAME_first", k)
-    add(group="Representation: finer habitat (CWHR 60-class)", feature_key=k, label=f"{lbl} conserved in 30x30",
+    add(src=[("WHRTYPE_percentFeature",k)], group="Representation: finer habitat (CWHR 60-class)", feature_key=k, label=f"{lbl} conserved in 30x30",
         definition=f"Proportional % of the statewide extent of CWHR habitat '{lbl}' ({k}) within 30x30 Conservation Areas.",
         metric="percent_of_feature", reported_value=f2(row["Disc"]),
         uncertainty=[f2(row["Lower80"]), f2(row["Upper20"])],
@@ -160,13 +162,13 @@ richness_keys = ["BioRankSW","BioRankEco","RarRankSW","RarRankEco",
  "ReptEndem","AmphEndem","MammEndem","BirdEndem","PlntEndem"]
 for k in richness_keys:
     row = allf[k]
-    add(group="Representation: richness/ranked biodiversity", feature_key=k, label=k,
+    add(src=[("all_percentFeature",k)], group="Representation: richness/ranked biodiversity", feature_key=k, label=k,
         definition=FEATURE_DEFS[k], metric="percent_of_feature", reported_value=f2(row["Disc"]),
         uncertainty=[f2(row["Lower80"]), f2(row["Upper20"])],
         gap34_pct=f2(row["g34"]), nonconserved_pct=f2(row["nonconserved"]), source="Tables 9-10 / ACE %feature")
 for name,src in [("plant","plant"),("endp","endp")]:
     row = load(f"{src}_percentFeature")[name]
-    add(group="Representation: richness/ranked biodiversity", feature_key=name, label=name,
+    add(src=[(f"{src}_percentFeature",name)], group="Representation: richness/ranked biodiversity", feature_key=name, label=name,
         definition=FEATURE_DEFS[name], metric="percent_of_feature", reported_value=f2(row["Disc"]),
         uncertainty=[f2(row["Lower80"]), f2(row["Upper20"])],
         gap34_pct=f2(row["g34"]), nonconserved_pct=f2(row["nonconserved"]), source="Table 11 / Kling %feature")
@@ -175,12 +177,12 @@ for name,src in [("plant","plant"),("endp","endp")]:
 conn = load("connectivity_percentFeature")
 for k in ["chn","int","diff","clink"]:
     row = conn[k]
-    add(group="Representation: connectivity", feature_key=k, label=k, definition=FEATURE_DEFS[k],
+    add(src=[("connectivity_percentFeature",k)], group="Representation: connectivity", feature_key=k, label=k, definition=FEATURE_DEFS[k],
         metric="percent_of_feature", reported_value=f2(row["Disc"]),
         uncertainty=[f2(row["Lower80"]), f2(row["Upper20"])],
         gap34_pct=f2(row["g34"]), nonconserved_pct=f2(row["nonconserved"]), source="Table 12 / connectivity %feature")
 row = allf["scmlinkage"]
-add(group="Representation: connectivity", feature_key="scmlinkage", label="scmlinkage", definition=FEATURE_DEFS["scmlinkage"],
+add(src=[("all_percentFeature","scmlinkage")], group="Representation: connectivity", feature_key="scmlinkage", label="scmlinkage", definition=FEATURE_DEFS["scmlinkage"],
     metric="percent_of_feature", reported_value=f2(row["Disc"]),
     uncertainty=[f2(row["Lower80"]), f2(row["Upper20"])],
     gap34_pct=f2(row["g34"]), nonconserved_pct=f2(row["nonconserved"]), source="Table 12 / connectivity %feature")
@@ -188,12 +190,12 @@ add(group="Representation: connectivity", feature_key="scmlinkage", label="scmli
 # ---- I. Freshwater (Table 13, %feature) ---------------------------------
 for k in ["gde","wetlands","fwa_rich","stream_1_2","stream_3_5","stream_6_9","stream_peren"]:
     row = allf[k]
-    add(group="Representation: freshwater", feature_key=k, label=k, definition=FEATURE_DEFS[k],
+    add(src=[("all_percentFeature",k)], group="Representation: freshwater", feature_key=k, label=k, definition=FEATURE_DEFS[k],
         metric="percent_of_feature", reported_value=f2(row["Disc"]),
         uncertainty=[f2(row["Lower80"]), f2(row["Upper20"])],
         gap34_pct=f2(row["g34"]), nonconserved_pct=f2(row["nonconserved"]), source="Table 13 / freshwater %feature")
 row = load("flood_percentFeature")["flood"]
-add(group="Representation: freshwater", feature_key="flood", label="flood", definition=FEATURE_DEFS["flood"],
+add(src=[("flood_percentFeature","flood")], group="Representation: freshwater", feature_key="flood", label="flood", definition=FEATURE_DEFS["flood"],
     metric="percent_of_feature", reported_value=f2(row["Disc"]),
     uncertainty=[f2(row["Lower80"]), f2(row["Upper20"])],
     gap34_pct=f2(row["g34"]), nonconserved_pct=f2(row["nonconserved"]), source="Table 13 / flood %feature")
@@ -201,7 +203,7 @@ add(group="Representation: freshwater", feature_key="flood", label="flood", defi
 # ---- climate/disturbance representation (%feature) ----------------------
 for k,src in [("miroc","miroc_percentFeature"),("slr5ft","all_percentFeature"),("fire_perimeter","all_percentFeature")]:
     row = load(src)[k] if src!="all_percentFeature" else allf[k]
-    add(group="Representation: climate/disturbance", feature_key=k, label=k, definition=FEATURE_DEFS[k],
+    add(src=[(src,k)], group="Representation: climate/disturbance", feature_key=k, label=k, definition=FEATURE_DEFS[k],
         metric="percent_of_feature", reported_value=f2(row["Disc"]),
         uncertainty=[f2(row["Lower80"]), f2(row["Upper20"])],
         gap34_pct=f2(row["g34"]), nonconserved_pct=f2(row["nonconserved"]), source="Richness/Tables / %feature")
@@ -221,8 +223,8 @@ record1 = {
  "n_statistics": len(stats),
  "statistics": stats,
 }
-with open("extraction_record.json","w") as f:
-    json.dump(record1, f, indent=2)
+rec.write(record1)
+with open(IDS, "w") as f: json.dump(ids, f, indent=1, sort_keys=True)
 
 # group counts
 from collections import Counter
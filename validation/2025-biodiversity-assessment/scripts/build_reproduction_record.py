@@ -1,92 +1,140 @@
 #!/usr/bin/env python3
 """Comprehensive reproduction_record.json: pairs every duckdb-geo reproduction with the
-report's proportional ('Disc') ground truth and classifies the match."""
-import csv, json, os
-CSVDIR="csvs/Result_CSVs_2025data"
-def load(name):
-    out={}
-    with open(os.path.join(CSVDIR,f"featureGAPSummary_{name}.csv")) as f:
-        r=csv.DictReader(f); k0=r.fieldnames[0]
-        for row in r: out[row[k0]]=row
-    return out
+report's proportional ('Disc') ground truth and classifies the match.
+
+Reproduced values default to those recorded from the duckdb-geo MCP sessions; with
+--compute they are recomputed by hexengine.py from a local hex mirror (HEX_ROOT), which
+also yields each one's Lower80 / Upper20 band from the same overlay pass. Entries carry
+the report's band too, and are classified against it as well as the fixed pp thresholds.
+--compute --by ecoregion[,county] adds "regional": each family's feature × region matrix
+(hexengine.regional, one grouped pass per family) as a sparse table per dimension."""
+import sys
+from summaries import load
+from incremental import Record
+inc=Record("reproduction_record.json","reproductions",script=__file__)
 def disc(name,key):
-    row=load(name).get(key)
-    return round(float(row["Disc"]),2) if row else None
-def cl(rep,rec):
-    if rep is None or rec is None: return "not_reproduced",None
+    inc.use(name,key); v=load(name).value(key)
+    return round(v,2) if v is not None else None
+def unc(name,key):
+    """The report's [Lower80, Upper20] for a summary row, or None."""
+    inc.use(name,key); t=load(name)
+    b=[t.value(key,"Lower80"),t.value(key,"Upper20")]
+    return None if None in b else [round(v,2) for v in b]
+def pp(d):
+    return "exact" if d<=0.10 else "near" if d<=1.0 else "moderate" if d<=3.0 else "far"
+def cl(rep,rec,band=None):
+    """(match class, |diff|, band class): 'in_band' when rec lies within the report's
+    [Lower80, Upper20] (either order), else 'outside_band'; None without a band."""
+    if rep is None or rec is None: return "not_reproduced",None,None
     d=round(abs(rep-rec),2)
-    return (("exact" if d<=0.10 else "near" if d<=1.0 else "moderate" if d<=3.0 else "far"),d)
+    b=None if band is None else "in_band" if min(band)<=rec<=max(band) else "outside_band"
+    return pp(d),d,b
+
+X,REG=None,{}
+if "--compute" in sys.argv:
+    from hexengine import regional, reproduce
+    X=reproduce()
+    if "--by" in sys.argv:
+        REG={by:regional(by) for by in sys.argv[sys.argv.index("--by")+1].split(",")}
+def computed(fam,recorded):
+    """The recorded values, or with --compute the engine's for the same keys (same order)."""
+    return recorded if X is None else {k:X[fam].get(k) for k in recorded}
+def cband(fam,key):
+    """With --compute, the engine's [Lower80, Upper20] for a reproduced value; else None."""
+    return None if X is None else X["bands"][fam].get(key)
 
 R=[]  # (id, group, label, reported, reproduced, dataset, note)
-def add(gid,group,label,reported,reproduced,dataset,note=""):
-    m,d=cl(reported,reproduced)
-    R.append({"id":gid,"group":group,"label":label,"reported_Disc":reported,
-              "reproduced":reproduced,"abs_diff":d,"match":m,"dataset":dataset,"note":note})
+def add(gid,group,label,reported,reproduced,dataset,note="",band=None,rband=None,key=None):
+    """key = the extraction statistic's feature_key (default: the label)."""
+    def build():
+        m,d,b=cl(reported,reproduced,band)
+        e={"id":gid,"group":group,"label":label,"feature_key":key or label,"reported_Disc":reported,
+           "reproduced":reproduced,"abs_diff":d,"match":m,"dataset":dataset,"note":note}
+        if band: e.update(reported_band=band,in_band=b)
+        if band and rband and None not in rband:
+            bd=round(max(abs(x-y) for x,y in zip(band,rband)),2)
+            e.update(reproduced_band=rband,band_abs_diff=bd,band_match=pp(bd))
+        return e
+    R.append(inc.put(gid,build,const=[group,label,key,reported,reproduced,dataset,note,band,rband]))
 
 # --- Land characterization (flat parquet, direct acres) ---
-add("land1","Land characterization","% of CA in 30x30 (GAP1+2)",26.1,26.08,"conserved-areas.parquet","SUM(Acres)/101.5M")
-add("land2","Land characterization","% of CA in GAP3+4",25.5,25.52,"conserved-areas.parquet","")
-add("land3","Land characterization","% of CA non-conserved",48.4,48.40,"conserved-areas.parquet","")
-add("land4","Land characterization","Acres still needed for 30%",4.0,3.98,"conserved-areas.parquet","0.30*101.5M - 26.471M = 3.98M ac")
-# acreage totals (exact integer)
-R.append({"id":"land5","group":"Land characterization","label":"Official GAP1+2 acreage",
-          "reported_Disc":26471461,"reproduced":26471461,"abs_diff":0,"match":"exact",
-          "dataset":"conserved-areas.parquet","note":"SUM(Acres)"})
+add("land1","Land characterization","% of CA in 30x30 (GAP1+2)",26.1,26.08,"conserved-areas.parquet","SUM(Acres)/101.5M",key="pct_ca_gap12")
+add("land2","Land characterization","% of CA in GAP3+4",25.5,25.52,"conserved-areas.parquet","",key="pct_ca_gap34")
+add("land3","Land characterization","% of CA non-conserved",48.4,48.40,"conserved-areas.parquet","",key="pct_ca_nonconserved")
+# acreage totals, in acres like the extraction record; classified at the report's stated precision
+land4={"id":"land4","group":"Land characterization","label":"Acres still needed for 30%","feature_key":"acres_needed_30pct",
+       "reported_Disc":4000000,"reproduced":3978539,"abs_diff":21461,"match":"exact",
+       "dataset":"conserved-areas.parquet","note":"0.30*101.5M - 26,471,461 = 3,978,539 ac; the report states 'nearly 4M' (0.1M ac precision)"}
+R.append(inc.put("land4",lambda:land4,const=land4))
+land5={"id":"land5","group":"Land characterization","label":"Official GAP1+2 acreage","feature_key":"gap12_acres",
+       "reported_Disc":26471461,"reproduced":26471461,"abs_diff":0,"match":"exact",
+       "dataset":"conserved-areas.parquet","note":"SUM(Acres)"}
+R.append(inc.put("land5",lambda:land5,const=land5))
 
 # --- Ecoregion network composition (all 20 match CSV Disc to <=0.01) ---
-for k,row in load("ecoregion_percentNetwork").items():
+for k in load("ecoregion_percentNetwork"):
     if k=="Network Total": continue
-    v=round(float(row["Disc"]),2); add("eco_"+k[:6],"Network composition: ecoregion",k,v,v,"conserved-areas.parquet","ecoregion SUM(Acres)/total")
+    v=disc("ecoregion_percentNetwork",k); add("eco_"+k[:6],"Network composition: ecoregion",k,v,v,"conserved-areas.parquet","ecoregion SUM(Acres)/total",band=unc("ecoregion_percentNetwork",k))
 
 # --- CWHR13 representation (13) ---
-h13rep={10:2.44,20:52.40,31:23.78,32:28.92,41:48.59,42:56.92,51:21.57,52:13.93,60:15.98,70:26.78,80:1.09,90:21.51,100:46.39}
+h13rep=computed("h13rep",{10:2.44,20:52.40,31:23.78,32:28.92,41:48.59,42:56.92,51:21.57,52:13.93,60:15.98,70:26.78,80:1.09,90:21.51,100:46.39})
 name13={10:"AGRICULTUR",20:"BARREN_OTH",31:"CONIFER_FO",32:"CONIFER_WO",41:"DESERT_SHR",42:"DESERT_WOO",51:"HARDWOOD_F",52:"HARDWOOD_W",60:"HERBACEOUS",70:"SHRUB",80:"URBAN",90:"WATER",100:"WETLAND"}
 for n,rec in h13rep.items():
-    add("h13r_%d"%n,"Representation: major habitat",name13[n],disc("WHR13NAME_percentFeature",name13[n]),rec,"cwhr13 hex-fractions + conserved hex","res-10 frac overlay")
+    add("h13r_%d"%n,"Representation: major habitat",name13[n],disc("WHR13NAME_percentFeature",name13[n]),rec,"cwhr13 hex-fractions + conserved hex","res-10 frac overlay",
+        band=unc("WHR13NAME_percentFeature",name13[n]),rband=cband("h13rep",n))
 # --- CWHR13 composition (13) ---
-h13comp={41:37.85,31:16.64,70:14.05,60:7.09,20:6.10,51:4.54,32:3.77,52:3.31,42:2.22,90:1.61,100:1.59,10:1.01,80:0.21}
+h13comp=computed("h13comp",{41:37.85,31:16.64,70:14.05,60:7.09,20:6.10,51:4.54,32:3.77,52:3.31,42:2.22,90:1.61,100:1.59,10:1.01,80:0.21})
 for n,rec in h13comp.items():
-    add("h13c_%d"%n,"Network composition: major habitat",name13[n],disc("WHR13NAME_percentNetwork",name13[n]),rec,"cwhr13 + conserved hex","res-10 overlay, renormalized")
+    add("h13c_%d"%n,"Network composition: major habitat",name13[n],disc("WHR13NAME_percentNetwork",name13[n]),rec,"cwhr13 + conserved hex","res-10 overlay, renormalized",
+        band=unc("WHR13NAME_percentNetwork",name13[n]),rband=cband("h13comp",n))
 
 # --- CWHR 60-class representation (62) ---
-cwhr_rep={1:78.94,3:15.27,4:19.42,5:27.72,6:52.4,7:12.12,8:9.53,9:10.4,10:23.12,11:31.03,12:26.93,13:27.23,14:17.01,15:16.75,17:50.64,18:37.35,19:66.17,20:8.22,21:27.65,22:52.39,24:34.95,25:63.37,26:16.3,27:16.7,28:23.18,29:70.31,30:11.71,32:31.03,34:31.33,35:15.61,36:20.34,37:43.61,39:30.72,40:41.85,41:50.41,42:9.89,43:22.05,44:24.46,45:46.4,48:84.55,49:38.83,50:20.03,51:19.65,53:1.09,55:10.63,56:21.56,57:9.44,58:26.33,59:41.73,60:5.76,61:2.73,66:7.57,67:0.77,68:0.86,69:1.5,70:3.03,71:4.38,72:5.24,75:0.68,77:12.8,78:2.26,79:15.8}
+cwhr_rep=computed("cwhr_rep",{1:78.94,3:15.27,4:19.42,5:27.72,6:52.4,7:12.12,8:9.53,9:10.4,10:23.12,11:31.03,12:26.93,13:27.23,14:17.01,15:16.75,17:50.64,18:37.35,19:66.17,20:8.22,21:27.65,22:52.39,24:34.95,25:63.37,26:16.3,27:16.7,28:23.18,29:70.31,30:11.71,32:31.03,34:31.33,35:15.61,36:20.34,37:43.61,39:30.72,40:41.85,41:50.41,42:9.89,43:22.05,44:24.46,45:46.4,48:84.55,49:38.83,50:20.03,51:19.65,53:1.09,55:10.63,56:21.56,57:9.44,58:26.33,59:41.73,60:5.76,61:2.73,66:7.57,67:0.77,68:0.86,69:1.5,70:3.03,71:4.38,72:5.24,75:0.68,77:12.8,78:2.26,79:15.8})
 whrnum2code={27:"KMC",45:"RFR",14:"DFR",37:"MRI",58:"WFR",39:"PGS",34:"MCP",48:"SCN",59:"WTM",3:"AGS",6:"BAR",35:"MHC",36:"MHW",53:"URB",44:"RDW",72:"PAS",13:"CSC",79:"MAR",60:"CRP",11:"CPC",24:"JPN",32:"MCH",71:"IRH",43:"RIV",29:"LPN",70:"IRF",10:"COW",21:"EST",28:"LAC",75:"VIN",49:"SEW",56:"VRI",42:"PPN",12:"CRC",67:"DOR",51:"SMC",5:"ASP",1:"ADS",30:"LSG",26:"JUN",50:"SGB",20:"EPN",7:"BBR",66:"DGR",69:"IGR",55:"VOW",9:"BOW",22:"FEW",4:"ASC",77:"EUC",78:"RIC",8:"BOP",68:"EOR",17:"DSC",40:"PJN",15:"DRI",57:"WAT",61:"OVN",19:"DSW",25:"JST",18:"DSS",41:"POS"}
 whrt=load("WHRTYPE_percentFeature")
 for n,rec in cwhr_rep.items():
     code=whrnum2code[n]; row=whrt.get(code)
     lbl=row.get("WHRNAME_first",code) if row else code
-    rep=round(float(row["Disc"]),2) if row else None
-    add("whr_%d"%n,"Representation: finer habitat (CWHR 60-class)",lbl,rep,rec,"cwhr hex-fractions + conserved hex","res-10 frac overlay")
+    rep=disc("WHRTYPE_percentFeature",code)
+    add("whr_%d"%n,"Representation: finer habitat (CWHR 60-class)",lbl,rep,rec,"cwhr hex-fractions + conserved hex","res-10 frac overlay",
+        band=unc("WHRTYPE_percentFeature",code),rband=cband("cwhr_rep",n),key=code)
 
 # --- connectivity ---
-for key,rec,ds,note in [("chn",22.37,"present-day-connectivity-categories","res-9 frac overlay"),
-                         ("int",21.69,"present-day-connectivity-categories","res-9"),
-                         ("diff",36.22,"present-day-connectivity-categories","res-9"),
-                         ("clink",44.12,"climate-migration-routes","res-9; best-effort class subset (channelized+climate); exact Schloss subset ambiguous"),
-                         ("scmlinkage",27.95,"regional-connectivity-linkages","res-8 presence overlay")]:
+conn=computed("conn",{"chn":22.37,"int":21.69,"diff":36.22})
+r8=computed("res8",{"scmlinkage":27.95,"plant":41.12,"endp":34.16,"fwa_rich":20.68})
+p10=computed("presence10",{"gde":32.76,"wetlands":30.08,"slr5ft":4.29})
+for key,rec,ds,note,rband in [("chn",conn["chn"],"present-day-connectivity-categories","res-9 frac overlay",cband("conn","chn")),
+                         ("int",conn["int"],"present-day-connectivity-categories","res-9",cband("conn","int")),
+                         ("diff",conn["diff"],"present-day-connectivity-categories","res-9",cband("conn","diff")),
+                         ("clink",44.12,"climate-migration-routes","res-9; best-effort class subset (channelized+climate); exact Schloss subset ambiguous",None),
+                         ("scmlinkage",r8["scmlinkage"],"regional-connectivity-linkages","res-8 presence overlay",cband("res8","scmlinkage"))]:
     src = "connectivity_percentFeature" if key in ("chn","int","diff") else "all_percentFeature" if key=="scmlinkage" else "connectivity_percentFeature"
     rep = disc(src,key) if key!="clink" else disc("connectivity_percentFeature","clink")
-    add("conn_"+key,"Representation: connectivity",key,rep,rec,ds,note)
+    add("conn_"+key,"Representation: connectivity",key,rep,rec,ds,note,band=unc(src,key),rband=rband)
 
 # --- plant / endemic plant (Kling) ---
-add("plant","Representation: richness (Kling plant)","plant",disc("plant_percentFeature","plant"),41.12,"plant-richness p80-hex","res-8 top-20% hotspot")
-add("endp","Representation: richness (Kling plant)","endp",disc("endp_percentFeature","endp"),34.16,"rarity-weighted-endemic-plant-richness p80-hex","res-8 top-20% hotspot")
+add("plant","Representation: richness (Kling plant)","plant",disc("plant_percentFeature","plant"),r8["plant"],"plant-richness p80-hex","res-8 top-20% hotspot",
+    band=unc("plant_percentFeature","plant"),rband=cband("res8","plant"))
+add("endp","Representation: richness (Kling plant)","endp",disc("endp_percentFeature","endp"),r8["endp"],"rarity-weighted-endemic-plant-richness p80-hex","res-8 top-20% hotspot",
+    band=unc("endp_percentFeature","endp"),rband=cband("res8","endp"))
 
 # --- ACE ranks + taxa ---
-allf=load("all_percentFeature")
-ace={"BioRankSW":21.53,"BioRankEco":22.75,"RarRankSW":23.92,"RarRankEco":25.15,
+ace=computed("res8",{"BioRankSW":21.53,"BioRankEco":22.75,"RarRankSW":23.92,"RarRankEco":25.15,
  "NtvRept":41.38,"NtvAmph":19.98,"NtvMamm":22.17,"NtvBird":12.25,"NtvPlnt":26.53,
  "RarRept":23.48,"RarAmph":28.7,"RarMamm":23.93,"RarBird":16.77,"RarPlnt":34.13,
- "ReptEndem":17.48,"AmphEndem":31.68,"MammEndem":22.77,"BirdEndem":18.48,"PlntEndem":27.15}
+ "ReptEndem":17.48,"AmphEndem":31.68,"MammEndem":22.77,"BirdEndem":18.48,"PlntEndem":27.15})
 for key,rec in ace.items():
     note="rank=5" if key.endswith(("RankSW","RankEco")) else ("top-20% (native)" if key.startswith("Ntv") else "top-5% (rare/endemic); threshold-sensitive")
-    add("ace_"+key,"Representation: richness/ranked biodiversity (ACE)",key,round(float(allf[key]["Disc"]),2),rec,"ace-terrestrial-biodiversity-summary","res-8 hexagon threshold + conserved overlay; "+note)
+    add("ace_"+key,"Representation: richness/ranked biodiversity (ACE)",key,disc("all_percentFeature",key),rec,"ace-terrestrial-biodiversity-summary","res-8 hexagon threshold + conserved overlay; "+note,
+        band=unc("all_percentFeature",key),rband=cband("res8",key))
 
 # --- freshwater area/presence ---
-add("gde","Representation: freshwater","gde",disc("all_percentFeature","gde"),32.76,"groundwater-dependent-ecosystems (veg+wetlands)","res-10 presence overlay")
-add("wetlands","Representation: freshwater","wetlands",disc("all_percentFeature","wetlands"),30.08,"wetlands-nwi (3 freshwater WETLAND_TYPE classes, CA)","res-10 presence overlay")
-add("fwa_rich","Representation: freshwater","fwa_rich",disc("all_percentFeature","fwa_rich"),20.68,"freshwater-species-richness (top-20% HUC12)","res-8 threshold overlay")
-add("slr5ft","Representation: climate/disturbance","slr5ft",disc("all_percentFeature","slr5ft"),4.29,"sea-level-rise (NOAA 5ft, CA)","res-10 presence; FAR: terrestrial conserved layer excludes bay/coastal-water SLR cells")
+for key,fam,rec,ds,note in [("gde","presence10",p10["gde"],"groundwater-dependent-ecosystems (veg+wetlands)","res-10 presence overlay"),
+                         ("wetlands","presence10",p10["wetlands"],"wetlands-nwi (3 freshwater WETLAND_TYPE classes, CA)","res-10 presence overlay"),
+                         ("fwa_rich","res8",r8["fwa_rich"],"freshwater-species-richness (top-20% HUC12)","res-8 threshold overlay")]:
+    add(key,"Representation: freshwater",key,disc("all_percentFeature",key),rec,ds,note,band=unc("all_percentFeature",key),rband=cband(fam,key))
+add("slr5ft","Representation: climate/disturbance","slr5ft",disc("all_percentFeature","slr5ft"),p10["slr5ft"],"sea-level-rise (NOAA 5ft, CA)","res-10 presence; FAR: terrestrial conserved layer excludes bay/coastal-water SLR cells",
+    band=unc("all_percentFeature","slr5ft"),rband=cband("presence10","slr5ft"))
 
 # --- not reproduced (flagged) ---
 for key,src,reason in [("miroc","miroc_percentFeature","needs the report's climate-stress threshold on the continuous Thorne exposure index"),
@@ -96,10 +144,12 @@ for key,src,reason in [("miroc","miroc_percentFeature","needs the report's clima
    ("stream_3_5","all_percentFeature","as stream_1_2"),
    ("stream_6_9","all_percentFeature","as stream_1_2"),
    ("stream_peren","all_percentFeature","as stream_1_2")]:
-    add("nr_"+key,"Not reproduced",key,disc(src,key),None,"—",reason)
+    add("nr_"+key,"Not reproduced",key,disc(src,key),None,"—",reason,band=unc(src,key))
 
 from collections import Counter
 mc=Counter(r["match"] for r in R)
+bc=Counter(r["in_band"] for r in R if r.get("in_band"))
+bm=Counter(r["band_match"] for r in R if r.get("band_match"))
 by_group={}
 for r in R:
     by_group.setdefault(r["group"],Counter())[r["match"]]+=1
@@ -110,16 +160,25 @@ rec={"record_type":"reproduction","tool":"duckdb-geo MCP query tool (NRP S3 GeoP
    "(res-10 fractional, res-9 fractional, res-8 presence/threshold). Constant cell area cancels in the ratio; "
    "statewide baseline calibrated to 25.4-26.1%."),
  "match_thresholds":{"exact":"<=0.10 pp","near":"<=1.0 pp","moderate":"<=3.0 pp","far":">3.0 pp"},
+ "band":("reported_band = the report's [Lower80, Upper20]; in_band = reproduced value within it. With --compute, "
+   "reproduced_band = the same overlay with each res-10 cell counted whole iff >=80% / >=20% GAP 1+2, and "
+   "band_match = the match class of its larger endpoint difference."),
  "n_reproduced_with_value":sum(1 for r in R if r["reproduced"] is not None),
  "n_not_reproduced":mc.get("not_reproduced",0),
  "match_summary":dict(mc),
+ "band_summary":dict(bc),
+ **({"band_match_summary":dict(bm)} if bm else {}),
  "match_by_group":{g:dict(c) for g,c in by_group.items()},
- "reproductions":R}
-json.dump(rec,open("reproduction_record.json","w"),indent=2)
+ "reproductions":R,
+ **({"regional":REG} if REG else {})}
+inc.write(rec)
 print("TOTAL rows:",len(R))
 print("with value:",rec["n_reproduced_with_value"]," not reproduced:",rec["n_not_reproduced"])
 for k in ["exact","near","moderate","far","not_reproduced"]:
     print(f"  {mc.get(k,0):3d}  {k}")
+print("against the report's Lower80/Upper20 band:",dict(bc),*(["  reproduced band:",dict(bm)] if bm else []))
+for by,t in REG.items():
+    print(f"regional by {by}: {len(t['rows'])} (family, key, region) rows over {len(t['regions'])} regions")
 print("\nBy group:")
 for g,c in by_group.items():
     print(f"  {g}: {dict(c)}")
@@ -1,52 +1,22 @@
-import json,re,glob,collections
+import json,re,glob,collections,sys
+from transcripts import cells as parse_cells  # streaming, byte-offset indexed; *.log or *.log.gz
+from grading import Key,Grades  # indexed key, precompiled extractors, vectorized verdicts
+from spans import Profile
 key=json.load(open('answer_key.json'))['questions']
-LOGS={'glm-5.2':'glm_full.log','nemotron-ultra':'nemo_full.log','qwen':'qwen_full.log'}
+# model=path runs, e.g. glm-5.2=runs/glm-5.2.jsonl from scripts/headless.py; else the recorded logs
+LOGS=dict(a.split('=',1) for a in sys.argv[1:] if '=' in a) or \
+     {'glm-5.2':'glm_full.log','nemotron-ultra':'nemo_full.log','qwen':'qwen_full.log'}
 ORG={'glm-5.2':'report_glm','nemotron-ultra':'report_nemo','qwen':'report_qwen'}
 
-def parse_cells(logfile):
-    txt=open(logfile).read(); dec=json.JSONDecoder(); cells=[]
-    for m in re.finditer(r'-----\s+q\d+__[^\n]+\.json\s+-----\n',txt):
-        s=txt.find('{',m.end())
-        if s<0: continue
-        try: obj,_=dec.raw_decode(txt,s); cells.append(obj)
-        except: pass
-    return cells
-def hpct(r):
-    if not r: return None
-    m=re.search(r'\*\*\s*~?\$?([\d,]+(?:\.\d+)?)\s*%',r) or re.search(r'([\d]+(?:\.\d+)?)\s*%',r)
-    return float(m.group(1).replace(',','')) if m else None
-def hnum(r):
-    if not r: return None
-    m=re.search(r'\*\*\s*~?\$?([\d,]+(?:\.\d+)?)\s*(million|M\b|acres)',r,re.I)
-    if m:
-        v=float(m.group(1).replace(',','')); 
-        if re.match(r'million|M',m.group(2),re.I): v*=1e6
-        return v
-    m=re.search(r'([\d,]{4,})\s*acres',r); return float(m.group(1).replace(',','')) if m else None
-def verdict(exp,val,unit,tol):
-    if val is None: return '·'
-    if unit=='acres': return '✓' if abs(val-exp)/exp<=0.02 else ('~' if abs(val-exp)/exp<=0.05 else '✗')
-    t=tol or 0.5; d=abs(val-exp)
-    return '✓' if d<=t else ('~' if d<=2*t else '✗')
-
-# grade per model
-res={m:{} for m in LOGS}
-for m,lf in LOGS.items():
-    for c in parse_cells(lf):
-        k=next((x for x in key if x['q']==c.get('question')),None)
-        if not k: continue
-        unit=k['unit']
-        v = hnum(c.get('response')) if unit=='acres' else (hpct(c.get('response')) if 'percent' in unit or unit.endswith('+percent') else None)
-        res[m].setdefault(c['question'],{})[c['trial']]=(v, c.get('response') is not None)
+# grade every (model, question, trial) cell in one pass
+K=Key(key)
+P=Profile()  # latency / cost per model, when the cells carry headless.py telemetry
+G=Grades(K,{m:P.tap(m,parse_cells(lf)) for m,lf in LOGS.items()})
 
 # per-model tally over numeric questions
-def cell_mark(m,q,unit,exp,tol):
-    d=res[m].get(q,{})
-    out=[]
-    for t in (1,2):
-        v,ok=d.get(t,(None,False))
-        out.append(verdict(exp,v,unit,tol) if ok else '⏱')
-    return out, d
+def cell_mark(m,q):
+    i=K.get(q); d={t:G.cell(m,i,t) for t in (1,2)}
+    return [d[t][2] for t in (1,2)], d
 short=[ "% CA in 30x30","% GAP3+4","% non-conserved","acres conserved","acres to 30%","top ecoregion %","Sierra %","top habitat %",
  "desert shrub","desert woodland","hardwood woodland","herbaceous","conifer forest","shrub","blue oak wood","eastside pine","subalpine conifer",
  "least-protected","ACE BioRankSW","native bird","native reptile","plant top20","channelized","diffuse","wetlands","GDE","floodplain",
@@ -59,7 +29,7 @@ for i,k in enumerate(key):
     cells={}
     for m in LOGS:
         if expn is None: cells[m]=('—',None); continue
-        marks,d=cell_mark(m,q,unit,expn,tol)
+        marks,d=cell_mark(m,q)
         v1=d.get(1,(None,))[0]; v2=d.get(2,(None,))[0]
         # representative for tally
         best=min(marks,key=lambda x:{'✓':0,'~':1,'✗':2,'⏱':3,'·':3}[x])
@@ -95,12 +65,16 @@ trow("**Cost (USD, 60 cells)**","**$2.98**","$3.32","n/a (self-hosted)")
 trow("— input / output split","$1.81 / $1.17","$2.57 / $0.74","—")
 o.append("\n- **Cost is input-dominated** (61% glm, 78% nemotron): the agent resends growing context each turn, so input volume (6–8 M tok) dwarfs output (0.26–0.40 M) even though output bills ~9–10× more per token. glm's **85% prompt-cache hit** (vs nemotron 47%) is why it's cheaper despite emitting more reasoning.")
 o.append("- nemotron is fastest wall-clock but least accurate and least stable (3 timeouts, ~8 non-deterministic). qwen is slowest and weakest.\n")
+if P.table():
+    o.append("## Latency & cost breakdown (measured)\n")
+    o.append("From the per-cell spans `scripts/headless.py` records (`scripts/spans.py` gives per-question and flame-graph views). Wall time split into LLM calls / MCP tool calls / harness overhead; context growth = extra prompt tokens resent per turn.\n")
+    o+=P.table(); o.append("")
 o.append("## 30-question scorecard\n")
 o.append("Per cell: `T1T2 value` — ✓ match · ~ close · ✗ mismatch · ⏱ timeout/no-answer · ⚠ trials disagree. Values are the extracted headline (heuristic).\n")
-o.append("| # | question | report | glm-5.2 | nemotron-ultra | qwen |")
-o.append("|--|--|--|--|--|--|")
+o.append("| # | question | report | "+" | ".join(LOGS)+" |")
+o.append("|--|--|--|"+"--|"*len(LOGS))
 for i,lab,es,cells in rows:
-    o.append(f"| {i} | {lab} | {es} | {cells['glm-5.2'][0]} | {cells['nemotron-ultra'][0]} | {cells['qwen'][0]} |")
+    o.append(f"| {i} | {lab} | {es} | "+" | ".join(cells[m][0] for m in LOGS)+" |")
 o.append("\n**Caveats.** Headline figures extracted heuristically from transcripts (a few cells may misparse); 30 Q is a subset of the partner's 149-bank; ranking/name questions (8, 18) aren't numerically scored. Cost = OpenRouter's per-call `cost` summed (pass-through). Streams questions (28–29) fail for all three via the `public-usgs-nhd` bucket listing issue (data-workflows#411).\n")
 open('model-performance.md','w').write("\n".join(o))
 print("wrote model-performance.md")
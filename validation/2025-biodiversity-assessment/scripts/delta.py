@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Change in conservation between two assessment vintages, from their rollups.
+
+Build a rollup per conserved-areas vintage (same land grid and feature layers, only the
+conserved inventory differs), then
+
+    ROLLUP_ROOT=hex/rollup-2022 python scripts/rollup.py    # with the 2022 conserved mirror
+    python scripts/delta.py hex/rollup-2022 hex/rollup-2025 [--json delta.json]
+
+One streaming pass over the aligned h0 partitions: each partition's two rollups are
+joined on cell (a cell missing from one side is conserved 0 there), the per-cell change
+in conserved land — w × area_km2, B minus A — is computed for each GAP class, and gains
+and losses are summed separately
+
+  total       statewide, from the res-10 cells; plus B's conserved share and the acres
+              still needed for 30% of the grid's land
+  ecoregion   per region, from the by=ecoregion tables (when both rollups have them)
+  features    every hexjoin family at its native resolution, frac-weighted: gain, loss,
+              net, and the % of the feature conserved in A and B
+
+The rollups carry GAP 1+2 and GAP 3+4 weights, so those are the classes. Areas are acres.
+Coarse-resolution feature deltas are per cell, so a gain and a loss inside one res-8 cell
+net out; the res-10 totals do not."""
+import argparse, glob, json, os, sys
+import numpy as np
+import pyarrow.parquet as pq
+from hexengine import ROOT
+from hexjoin import KernelEngine, feature_rows, match
+
+ACRES_PER_KM2 = 247.105381
+CLASSES = {"gap12": "w12", "gap34": "w34"}
+TARGET = 0.30
+
+def parts(rollup, res=10):
+    return {os.path.basename(os.path.dirname(p)) for p in glob.glob(os.path.join(rollup, f"res={res}", "h0=*", "data_0.parquet"))}
+
+def load(rollup, res, part, remap=None, by=None):
+    """(keys [1 or 2 × n]: cell[, region as remap[grp]], [n × (conserved km² per class, area)])."""
+    base = os.path.join(rollup, f"by={by}") if by else rollup
+    path = os.path.join(base, f"res={res}", part, "data_0.parquet")
+    if not os.path.exists(path): return np.zeros((2 if by else 1, 0), np.uint64), np.zeros((0, len(CLASSES) + 1))
+    t = pq.read_table(path, columns=["cell", *(["grp"] if by else []), *CLASSES.values(), "area_km2"])
+    a = t["area_km2"].to_numpy()
+    keys = [t["cell"].to_numpy().astype(np.uint64, copy=False)]
+    if by: keys.append(np.asarray(remap, np.uint64)[t["grp"].to_numpy()])
+    return np.stack(keys), np.column_stack([t[w].to_numpy() * a for w in CLASSES.values()] + [a])
+
+def align(a, b):
+    """Union of two sides' keys, and each side's rows on it (zeros where a key is missing)."""
+    ka, xa = a
+    kb, xb = b
+    u, inv = np.unique(np.concatenate([ka, kb], axis=1), axis=1, return_inverse=True)
+    inv = inv.ravel()
+    XA, XB = np.zeros((u.shape[1], xa.shape[1])), np.zeros((u.shape[1], xb.shape[1]))
+    XA[inv[:ka.shape[1]]] = xa
+    XB[inv[ka.shape[1]:]] = xb
+    return u, XA, XB
+
+def _split(k, n, f, A, B):
+    """[n × classes × (A, B, gain, loss)] conserved km² and [n × (extent A, extent B)] by label k."""
+    d = B[:, :-1] - A[:, :-1]
+    cols = [A[:, :-1], B[:, :-1], np.maximum(d, 0), np.minimum(d, 0)]
+    nc = len(CLASSES)
+    num = np.stack([np.bincount(k, weights=f * c[:, j], minlength=n) for j in range(nc) for c in cols], axis=1)
+    den = np.stack([np.bincount(k, weights=f * X[:, -1], minlength=n) for X in (A, B)], axis=1)
+    return num.reshape(n, nc, len(cols)), den
+
+def _out(num, den):
+    """Acres {gap class: {gain, loss, net, pct_a, pct_b}} of one accumulated row."""
+    ac = lambda v: round(float(v) * ACRES_PER_KM2, 1)
+    pc = lambda v, d: round(100.0 * float(v) / d, 2) if d else None
+    return {c: {"gain": ac(g), "loss": ac(l), "net": ac(g + l), "pct_a": pc(a, den[0]), "pct_b": pc(b, den[1])}
+            for c, (a, b, g, l) in zip(CLASSES, num)}
+
+def delta(a, b, root=None, by="ecoregion"):
+    """{"total", "ecoregion", "features"} change from rollup `a` to rollup `b` (see module doc)."""
+    root = root or ROOT
+    groups = []
+    for r in (a, b):
+        try:
+            with open(os.path.join(r, "_groups.json")) as f: groups.append(json.load(f).get(by))
+        except (OSError, ValueError): groups.append(None)
+    regions = sorted(set(groups[0]) | set(groups[1])) if None not in groups else None
+    ridx = [[regions.index(n) for n in g] for g in groups] if regions else None
+    specs = KernelEngine(root=root, rollup=b).specs()   # feature thresholds from the (shared) feature layers
+    fams = [f for _, fs in specs.values() for f in fs]
+    tot, totden = np.zeros((1, len(CLASSES), 4)), np.zeros((1, 2))
+    reg = (np.zeros((len(regions), len(CLASSES), 4)), np.zeros((len(regions), 2))) if regions else None
+    acc = {f.name: (np.zeros((len(f.labels), len(CLASSES), 4)), np.zeros((len(f.labels), 2))) for f in fams}
+    for part in sorted(parts(a) | parts(b)):   # aligned h0 partitions, one at a time
+        side = {}
+        for res in sorted({10, *(f.res for f in fams)}):
+            side[res] = align(load(a, res, part), load(b, res, part))
+        cells, A, B = side[10]
+        n, d = _split(np.zeros(cells.shape[1], np.int64), 1, np.ones(cells.shape[1]), A, B)
+        tot += n; totden += d
+        if regions:
+            keys, A, B = align(load(a, 10, part, ridx[0], by), load(b, 10, part, ridx[1], by))
+            n, d = _split(keys[1].astype(np.int64), len(regions), np.ones(keys.shape[1]), A, B)
+            reg[0][:] += n; reg[1][:] += d
+        for fam in fams:
+            cell, k, f = feature_rows(fam, part)
+            keys, A, B = side[fam.res]
+            i = match(keys[0], cell)
+            keep = i >= 0   # outside the California grid in both vintages
+            n, d = _split(k[keep], len(fam.labels), f[keep], A[i[keep]], B[i[keep]])
+            acc[fam.name][0][:] += n; acc[fam.name][1][:] += d
+    total = _out(tot[0], totden[0])
+    land = float(totden[0, 1])
+    conserved = float(tot[0, 0, 1])
+    total["land_acres"] = round(land * ACRES_PER_KM2, 1)
+    total["needed_30pct_acres"] = round(max(TARGET * land - conserved, 0.0) * ACRES_PER_KM2, 1)
+    features = {}
+    for name, (_, fs) in specs.items():
+        for fam in fs:
+            num, den = acc[fam.name]
+            for j, lab in enumerate(fam.labels):
+                if den[j].any(): features.setdefault(name, {})[str(lab)] = _out(num[j], den[j])
+    return {"a": a, "b": b, "units": "acres", "total": total,
+            **({by: {r: _out(*[x[i] for x in reg]) for i, r in enumerate(regions) if reg[1][i].any()}} if regions else {}),
+            "features": features}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("a", help="rollup of the earlier vintage")
+    ap.add_argument("b", help="rollup of the later vintage")
+    ap.add_argument("--root", default=ROOT, help="hex mirror of the feature layers (HEX_ROOT)")
+    ap.add_argument("--by", default="ecoregion", help="GROUPS dimension for the regional breakdown")
+    ap.add_argument("--json", help="write the full result here")
+    x = ap.parse_args(argv)
+    out = delta(x.a, x.b, root=x.root, by=x.by)
+    t = out["total"]
+    for c in CLASSES:
+        print(f"{c}: +{t[c]['gain']:,.0f} / {t[c]['loss']:,.0f} ac, net {t[c]['net']:+,.0f} ac "
+              f"({t[c]['pct_a']} -> {t[c]['pct_b']} % of land)")
+    print(f"still needed for {TARGET:.0%}: {t['needed_30pct_acres']:,.0f} ac of {t['land_acres']:,.0f}")
+    for r, v in sorted(out.get(x.by, {}).items(), key=lambda kv: -kv[1]["gap12"]["net"]):
+        print(f"  {r:<48} {v['gap12']['net']:+14,.0f} ac  ({v['gap12']['pct_a']} -> {v['gap12']['pct_b']} %)")
+    if x.json:
+        with open(x.json, "w") as f: json.dump(out, f, indent=1)
+
+if __name__ == "__main__":
+    sys.exit(main())
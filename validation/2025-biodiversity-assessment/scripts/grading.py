@@ -0,0 +1,99 @@
+"""Grading core for the scorecard: an indexed answer key, precompiled headline extractors,
+and verdicts computed as one vectorized pass over every (model, question, trial) cell.
+
+Semantics are exactly the old per-cell verdict(): no value -> '·'; acres graded on
+relative error (≤2% ✓, ≤5% ~, else ✗); everything else on absolute error against
+t = tolerance_pp or 0.5 (≤t ✓, ≤2t ~, else ✗)."""
+import re
+import numpy as np
+
+PCT_BOLD = re.compile(r'\*\*\s*~?\$?([\d,]+(?:\.\d+)?)\s*%')
+PCT      = re.compile(r'([\d]+(?:\.\d+)?)\s*%')
+NUM_BOLD = re.compile(r'\*\*\s*~?\$?([\d,]+(?:\.\d+)?)\s*(million|M\b|acres)', re.I)
+MILLION  = re.compile(r'million|M', re.I)
+ACRES    = re.compile(r'([\d,]{4,})\s*acres')
+MARKS    = np.array(['✓', '~', '✗', '·'])
+
+def hpct(r):
+    if not r: return None
+    m = PCT_BOLD.search(r) or PCT.search(r)
+    return float(m.group(1).replace(',', '')) if m else None
+
+def hnum(r):
+    if not r: return None
+    m = NUM_BOLD.search(r)
+    if m:
+        v = float(m.group(1).replace(',', ''))
+        if MILLION.match(m.group(2)): v *= 1e6
+        return v
+    m = ACRES.search(r)
+    return float(m.group(1).replace(',', '')) if m else None
+
+def extractor(unit):
+    """Headline extractor for an answer-key unit, or None if the unit isn't numerically graded."""
+    if unit == 'acres': return hnum
+    if 'percent' in unit or unit.endswith('+percent'): return hpct
+    return None
+
+class Key:
+    """report_qa_answer_key.json questions indexed by text (first entry wins, as before),
+    with expected value / tolerance / acres-ness as arrays aligned to key order."""
+    def __init__(self, questions):
+        self.questions = questions
+        self.index = {}
+        for i, k in enumerate(questions): self.index.setdefault(k['q'], i)
+        self.exp = np.array([float(k['answer']) if isinstance(k['answer'], (int, float)) else np.nan for k in questions])
+        self.tol = np.array([k.get('tolerance_pp') or 0.5 for k in questions], dtype=float)
+        self.acres = np.array([k['unit'] == 'acres' for k in questions])
+        self.extract = [extractor(k['unit']) for k in questions]
+
+    def __len__(self): return len(self.questions)
+    def get(self, q): return self.index.get(q)
+
+def verdicts(exp, val, acres, tol):
+    """Vectorized verdict(): arrays in, array of '✓' / '~' / '✗' / '·' out (NaN val = no value)."""
+    exp, val, tol = (np.asarray(x, dtype=float) for x in (exp, val, tol))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d = np.where(acres, np.abs(val - exp) / exp, np.abs(val - exp))
+    t = np.where(acres, 0.02, tol)
+    t2 = np.where(acres, 0.05, 2 * tol)
+    code = np.where(d <= t, 0, np.where(d <= t2, 1, 2))
+    return MARKS[np.where(np.isnan(val), 3, code)]
+
+def verdict(exp, val, unit, tol):
+    """Single-cell verdict(), kept for callers grading one value."""
+    return str(verdicts([exp], [np.nan if val is None else val], [unit == 'acres'], [tol or 0.5])[0])
+
+class Grades:
+    """Every graded cell as columns: model / question index / trial / value (NaN = none) /
+    answered / mark. A later cell for the same (model, question, trial) replaces an earlier one."""
+    def __init__(self, key, cells_by_model):
+        key = key if isinstance(key, Key) else Key(key)
+        latest, memo = {}, {}
+        for m, cells in cells_by_model.items():
+            for c in cells:
+                i = key.get(c.get('question'))
+                if i is None: continue
+                r, f = c.get('response'), key.extract[i]
+                if f is None: v = None
+                else:
+                    if (f, r) not in memo: memo[f, r] = f(r)
+                    v = memo[f, r]
+                latest[m, i, c['trial']] = (v, r is not None)
+        ks = list(latest)
+        self.model = [k[0] for k in ks]
+        self.qi = np.array([k[1] for k in ks], dtype=int)
+        self.trial = [k[2] for k in ks]
+        self.value = np.array([np.nan if v is None else v for v, _ in latest.values()], dtype=float)
+        self.answered = np.array([ok for _, ok in latest.values()], dtype=bool)
+        qi = self.qi if len(ks) else np.zeros(0, dtype=int)
+        self.mark = verdicts(key.exp[qi], self.value, key.acres[qi], key.tol[qi])
+        self.mark = np.where(self.answered, self.mark, '⏱')
+        self.at = {k: j for j, k in enumerate(ks)}
+
+    def cell(self, m, i, t):
+        """(value or None, answered, mark) for one cell; (None, False, '⏱') if it never ran."""
+        j = self.at.get((m, i, t))
+        if j is None: return None, False, '⏱'
+        v = self.value[j]
+        return (None if np.isnan(v) else float(v)), bool(self.answered[j]), str(self.mark[j])
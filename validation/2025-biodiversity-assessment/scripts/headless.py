@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Parallel headless benchmark of headless-questions.txt against an OpenAI-compatible endpoint.
+
+Each (question, trial) cell is one agent loop: the system prompt + question go to
+/chat/completions (streamed) with the MCP server's tools attached; tool calls are
+executed against the MCP endpoint and fed back until the model answers or --max-turns
+is hit. Cells run concurrently, bounded by --concurrency. One JSON line per finished
+cell is appended to --out:
+
+    question, trial, qid, model, response (null on timeout / error),
+    ttft_s (first streamed token of the first call), latency_s, api_calls, tool_calls,
+    input_tokens, cached_tokens, uncached_tokens, output_tokens, reasoning_tokens,
+    cost (when the endpoint reports it), timed_out, error,
+    spans (per-turn llm / tool timings, tokens, SQL — see spans.py)
+
+build_scorecard.py reads these files like the old *_full.log transcripts. Cells already
+in --out that finished cleanly are skipped, so a reaped run resumes; errored and
+timed-out cells run again (grading keeps the later line). Run scripts/mockllm.py for a
+local endpoint + MCP server that needs no network or key:
+
+    python scripts/headless.py --model z-ai/glm-5.2 --endpoint http://localhost:8080/api/llm \\
+        --trials 2 --concurrency 8 --out runs/glm.jsonl"""
+import argparse, asyncio, json, os, sys, time, urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from spans import Trace, tool_stats
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.normpath(os.path.join(HERE, "..", "..", ".."))
+
+def _mcp_url():
+    try:
+        with open(os.path.join(REPO, "layers-input.json")) as f: return json.load(f)["mcp_url"]
+    except (OSError, ValueError, KeyError): return None
+
+# ---- transport (blocking; run in worker threads) --------------------------------
+def _post(url, body, headers=None, timeout=600):
+    req = urllib.request.Request(url, json.dumps(body).encode(), method="POST",
+                                 headers={"Content-Type": "application/json", **(headers or {})})
+    return urllib.request.urlopen(req, timeout=timeout)
+
+def _events(resp):
+    """`data:` payloads of a server-sent-event stream."""
+    for raw in resp:
+        line = raw.decode("utf-8", "replace").strip()
+        if line.startswith("data:"):
+            data = line[5:].strip()
+            if data and data != "[DONE]": yield data
+
+def chat(endpoint, key, body, timeout):
+    """One streamed chat completion -> (assistant message, usage dict, seconds to first token)."""
+    t0, ttft = time.monotonic(), None
+    text, calls, usage = [], {}, {}
+    body = {**body, "stream": True, "stream_options": {"include_usage": True}}
+    with _post(endpoint.rstrip("/") + "/chat/completions", body,
+               {"Authorization": f"Bearer {key}", "Accept": "text/event-stream"}, timeout) as resp:
+        for data in _events(resp):
+            ev = json.loads(data)
+            usage = ev.get("usage") or usage
+            for ch in ev.get("choices") or ():
+                d = ch.get("delta") or {}
+                if (d.get("content") or d.get("tool_calls") or d.get("reasoning")) and ttft is None:
+                    ttft = time.monotonic() - t0
+                if d.get("content"): text.append(d["content"])
+                for tc in d.get("tool_calls") or ():
+                    c = calls.setdefault(tc.get("index", 0), {"id": "", "type": "function",
+                                                                "function": {"name": "", "arguments": ""}})
+                    c["id"] = tc.get("id") or c["id"]
+                    fn = tc.get("function") or {}
+                    c["function"]["name"] += fn.get("name") or ""
+                    c["function"]["arguments"] += fn.get("arguments") or ""
+    msg = {"role": "assistant", "content": "".join(text) or None}
+    if calls: msg["tool_calls"] = [calls[i] for i in sorted(calls)]
+    return msg, usage, ttft
+
+class MCP:
+    """Minimal streamable-HTTP MCP client: initialize, tools/list, tools/call."""
+    def __init__(self, url, timeout=600):
+        self.url, self.timeout, self.session, self._id = url, timeout, None, 0
+
+    def rpc(self, method, params=None, notify=False):
+        self._id += 1
+        body = {"jsonrpc": "2.0", "method": method, **({} if notify else {"id": self._id}),
+                **({"params": params} if params is not None else {})}
+        headers = {"Accept": "application/json, text/event-stream"}
+        if self.session: headers["Mcp-Session-Id"] = self.session
+        with _post(self.url, body, headers, self.timeout) as resp:
+            self.session = resp.headers.get("Mcp-Session-Id") or self.session
+            if notify: return None
+            if "text/event-stream" in resp.headers.get("Content-Type", ""):
+                msgs = [json.loads(d) for d in _events(resp)]
+                out = next((m for m in msgs if m.get("id") == self._id), msgs[-1] if msgs else {})
+            else:
+                out = json.load(resp)
+        if "error" in out: raise RuntimeError(f"MCP {method}: {out['error']}")
+        return out.get("result", {})
+
+    def connect(self):
+        self.rpc("initialize", {"protocolVersion": "2025-03-26", "capabilities": {},
+                                "clientInfo": {"name": "ca30x30-headless", "version": "1"}})
+        self.rpc("notifications/initialized", notify=True)
+        return self
+
+    def tools(self):
+        """MCP tools in OpenAI function-tool form."""
+        return [{"type": "function", "function": {"name": t["name"], "description": t.get("description", ""),
+                 "parameters": t.get("inputSchema") or {"type": "object", "properties": {}}}}
+                for t in self.rpc("tools/list").get("tools", [])]
+
+    def call(self, name, args):
+        """(text content, raw result) of a tools/call."""
+        res = self.rpc("tools/call", {"name": name, "arguments": args})
+        return "\n".join(c.get("text", "") for c in res.get("content", []) if c.get("type") == "text"), res
+
+# ---- one cell ------------------------------------------------------------------
+def run_cell(a, system, tools, qid, question, trial):
+    mcp = MCP(a.mcp, a.timeout).connect() if tools else None
+    msgs = [{"role": "system", "content": system}, {"role": "user", "content": question}]
+    rec = {"question": question, "trial": trial, "qid": qid, "model": a.model, "response": None,
+           "ttft_s": None, "latency_s": None, "api_calls": 0, "tool_calls": 0, "input_tokens": 0,
+           "cached_tokens": 0, "uncached_tokens": 0, "output_tokens": 0, "reasoning_tokens": 0,
+           "cost": None, "timed_out": False, "error": None}
+    t0, trace = time.monotonic(), Trace()
+    try:
+        for turn in range(1, a.max_turns + 1):
+            if time.monotonic() - t0 > a.cell_timeout: rec["timed_out"] = True; break
+            with trace.span("llm", a.model) as sp:
+                msg, u, ttft = chat(a.endpoint, a.api_key, {"model": a.model, "messages": msgs,
+                                                            **({"tools": tools} if tools else {})}, a.timeout)
+                sp.update(trace.llm(turn, u, ttft, len(msgs)))
+            rec["api_calls"] += 1
+            if rec["ttft_s"] is None: rec["ttft_s"] = ttft
+            rec["input_tokens"] += sp["prompt_tokens"]
+            rec["cached_tokens"] += sp["cached_tokens"]
+            rec["output_tokens"] += sp["completion_tokens"]
+            rec["reasoning_tokens"] += sp["reasoning_tokens"]
+            if sp["cost"] is not None: rec["cost"] = (rec["cost"] or 0) + sp["cost"]
+            msgs.append(msg)
+            if not msg.get("tool_calls"):
+                rec["response"] = msg.get("content"); break
+            for tc in msg["tool_calls"]:
+                rec["tool_calls"] += 1
+                try:
+                    args = json.loads(tc["function"]["arguments"] or "{}")
+                    if not isinstance(args, dict): raise ValueError(f"expected an object, got {type(args).__name__}")
+                except ValueError as e:   # back to the model, never sent to MCP as an empty call
+                    out = f"ERROR: invalid JSON arguments: {e}"
+                    with trace.span("tool", tc["function"]["name"], turn=turn) as sp: sp["error"] = out
+                    msgs.append({"role": "tool", "tool_call_id": tc["id"], "content": out})
+                    continue
+                sql = next((args[k] for k in ("sql_query", "sql", "query") if isinstance(args.get(k), str)), None)
+                with trace.span("tool", tc["function"]["name"], turn=turn, sql=sql) as sp:
+                    try:
+                        out, res = mcp.call(tc["function"]["name"], args)
+                        sp.update(tool_stats(res, out))
+                    except Exception as e:
+                        out = f"ERROR: {e}"; sp["error"] = out
+                msgs.append({"role": "tool", "tool_call_id": tc["id"], "content": out})
+        else:
+            rec["timed_out"] = True
+    except Exception as e:
+        rec["error"] = f"{type(e).__name__}: {e}"
+        rec["timed_out"] = isinstance(e, TimeoutError) or "timed out" in str(e)
+    rec["uncached_tokens"] = rec["input_tokens"] - rec["cached_tokens"]
+    rec["latency_s"] = round(time.monotonic() - t0, 3)
+    if rec["ttft_s"] is not None: rec["ttft_s"] = round(rec["ttft_s"], 3)
+    rec["spans"] = trace.spans
+    return rec
+
+# ---- the run ---------------------------------------------------------------------
+def done_cells(path):
+    """(qid, trial) of the cells in `path` that finished without an error or timeout."""
+    out = set()
+    try:
+        with open(path) as f:
+            for line in f:
+                try: c = json.loads(line)
+                except ValueError: continue
+                if "qid" in c and c.get("error") is None and not c.get("timed_out"): out.add((c["qid"], c.get("trial")))
+    except OSError: pass
+    return out
+
+async def run(a):
+    with open(a.questions) as f: qs = [q.strip() for q in f if q.strip()]
+    with open(a.system) as f: system = f.read()
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=a.concurrency))
+    tools = await asyncio.to_thread(lambda: MCP(a.mcp, a.timeout).connect().tools()) if a.mcp else []
+    skip = done_cells(a.out)
+    todo = [(f"q{i:02d}", q, t) for i, q in enumerate(qs, 1) for t in range(1, a.trials + 1)
+            if (f"q{i:02d}", t) not in skip]
+    os.makedirs(os.path.dirname(os.path.abspath(a.out)), exist_ok=True)
+    sem, lock, t0 = asyncio.Semaphore(a.concurrency), asyncio.Lock(), time.monotonic()
+    out = open(a.out, "a")
+    async def one(qid, q, t):
+        async with sem:
+            rec = await asyncio.to_thread(run_cell, a, system, tools, qid, q, t)
+        async with lock:
+            out.write(json.dumps(rec) + "\n"); out.flush()
+        mark = "⏱" if rec["timed_out"] else ("!" if rec["error"] else "✓")
+        print(f"{mark} {qid} t{t}  {rec['latency_s']:.1f}s  {rec['api_calls']} calls  {rec['tool_calls']} tools",
+              file=sys.stderr, flush=True)
+        return rec
+    try: recs = await asyncio.gather(*(one(*c) for c in todo))
+    finally: out.close()
+    wall = time.monotonic() - t0
+    print(f"{a.model}: {len(recs)} cells ({len(skip)} already done in {a.out}) in {wall:.1f}s wall, "
+          f"{sum(r['latency_s'] for r in recs):.1f}s cell time, concurrency {a.concurrency}", file=sys.stderr)
+    return recs
+
+def main(argv=None):
+    here = os.path.dirname(HERE)
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--model", default=os.environ.get("LLM_MODEL", "z-ai/glm-5.2"))
+    ap.add_argument("--endpoint", default=os.environ.get("LLM_ENDPOINT", "http://localhost:8080/api/llm"))
+    ap.add_argument("--api-key", default=os.environ.get("LLM_API_KEY", "unused"))
+    ap.add_argument("--mcp", default=os.environ.get("MCP_URL", _mcp_url()), help="MCP endpoint ('' for no tools)")
+    ap.add_argument("--questions", default=os.path.join(here, "headless-questions.txt"))
+    ap.add_argument("--system", default=os.path.join(REPO, "system-prompt.md"))
+    ap.add_argument("--trials", type=int, default=2)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--max-turns", type=int, default=30)
+    ap.add_argument("--timeout", type=float, default=600, help="per HTTP call, matching the /api/llm chain")
+    ap.add_argument("--cell-timeout", type=float, default=1800)
+    ap.add_argument("--out")
+    a = ap.parse_args(argv)
+    a.out = a.out or os.path.join("runs", a.model.split("/")[-1] + ".jsonl")
+    asyncio.run(run(a))
+
+if __name__ == "__main__":
+    main()
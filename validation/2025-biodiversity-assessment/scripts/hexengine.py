@@ -0,0 +1,321 @@
+"""In-process DuckDB engine for the QUERIES.md hex overlays, run against a local mirror
+of the NRP hex GeoParquet partitions (`<HEX_ROOT>/<bucket>/<prefix>/h0=*/data_0.parquet`).
+
+The conserved-weight table at each resolution (res-10 w, res-9 w/7, res-8 wsum + nland)
+is built once per session as a temp table; every feature family is then one grouped
+pass (all 13 CWHR13 / 62 CWHR classes, all connectivity categories, all res-10 presence
+features, all res-8 threshold features), and each result is memoized on disk under the
+dataset version — a digest of the partition files it read — so re-running after an
+unchanged refresh is free.
+
+Every family carries the report's Lower80 / Upper20 band alongside the point estimate:
+the same pass sums three numerators, one per conserved weighting in WEIGHTS — the
+proportional GAP 1+2 share, and the share of land in cells at least 80% / 20% GAP 1+2 —
+so a result is {class: [num, den, num_lower80, num_upper20]}.
+
+With `by` (a GROUPS name: ecoregion, county) the same single pass joins rollup.py's
+per-(cell, group) table instead and returns the whole feature × region matrix,
+{class: {region: [num, den, num_lower80, num_upper20]}}, regions with no land omitted;
+regional() flattens every family into one sparse table.
+
+    aws s3 sync s3://public-ca30x30/cwhr13/hex-fractions $HEX_ROOT/public-ca30x30/cwhr13/hex-fractions
+    python scripts/build_reproduction_record.py --compute
+"""
+import glob, hashlib, json, os
+
+ROOT = os.environ.get("HEX_ROOT", "hex")
+CACHE = os.environ.get("HEX_CACHE", os.path.join(ROOT, ".hexcache"))
+ROLLUP = os.environ.get("ROLLUP_ROOT", os.path.join(ROOT, "rollup"))
+
+# local mirror dir -> same bucket/prefix layout as S3 (QUERIES.md and system-prompt.md for the first seven;
+# the rest follow the dataset names recorded in reproduction_record.json)
+DATASETS = {
+ "conserved": "public-ca30x30/conserved-areas-terrestrial-2025/hex",
+ "ecoregion": "public-ca30x30/ca30x30-ecoregion/hex",   # the California land grid / mask
+ "cwhr13": "public-ca30x30/cwhr13/hex-fractions",
+ "cwhr": "public-ca30x30/cwhr/hex-fractions",
+ "connectivity": "public-connectivity/present-day-connectivity-categories/hex-fractions",
+ "plant": "public-ca30x30/plant-richness/p80-hex",
+ "wetlands": "public-wetlands/nwi-v2/hex",
+ "endp": "public-ca30x30/rarity-weighted-endemic-plant-richness/p80-hex",
+ "gde": "public-ca30x30/groundwater-dependent-ecosystems/hex",
+ "slr": "public-ca30x30/sea-level-rise/hex",
+ "ace": "public-ca30x30/ace-terrestrial-biodiversity-summary/hex",
+ "fwa": "public-ca30x30/freshwater-species-richness/hex",
+ "scmlinkage": "public-ca30x30/regional-connectivity-linkages/hex",
+ "county": "public-census/census-2024/county/hex",
+}
+# grouping dimensions for regional breakdowns: name -> (res-10 hex dataset, region column)
+GROUPS = {"ecoregion": ("ecoregion", "CA_Ecoregi"), "county": ("county", "NAMELSAD")}
+
+# conserved weightings, one numerator each: proportional (the point estimate), then the
+# report's Lower80 / Upper20 band — a res-10 cell counts whole iff >= 80% / >= 20% GAP 1+2
+WEIGHTS = ("w12", "w12_lo", "w12_hi")
+BAND_CUTS = {"w12_lo": 0.8, "w12_hi": 0.2}
+MEMO_SCHEMA = 2   # bump when a family's result shape changes (2: band numerators)
+
+CONN_CAT = {"diff": (25, 29), "int": (31, 35, 39), "chn": (41, 45, 49)}
+NWI_TYPES = ("Freshwater Emergent Wetland", "Freshwater Forested/Shrub Wetland", "Estuarine and Marine Wetland")
+# res-10 presence features: key -> (dataset, filters as pyarrow (col, op, value) triples, ANDed)
+PRESENCE10 = {
+ "wetlands": ("wetlands", [("state_code", "=", "CA"), ("WETLAND_TYPE", "in", NWI_TYPES)]),
+ "gde": ("gde", None),
+ "slr5ft": ("slr", None),
+}
+
+def where(filters):
+    """SQL WHERE body for pyarrow-style filter triples."""
+    lit = lambda v: f"'{v}'" if isinstance(v, str) else str(v)
+    return " AND ".join(f"{c} IN ({','.join(lit(x) for x in v)})" if op == "in" else f"{c} {op} {lit(v)}"
+                        for c, op, v in filters)
+# res-8 features: key -> (dataset, column, rule); rule = ('eq', v) | ('quantile', q[, unit col]) | None
+# (presence). A unit column takes the quantile over distinct units (fwa: HUC12), not cells.
+ACE_RANKS = ("BioRankSW", "BioRankEco", "RarRankSW", "RarRankEco")
+ACE_TAXA = ("Rept", "Amph", "Mamm", "Bird", "Plnt")
+RES8 = {
+ "plant": ("plant", None, None),
+ "endp": ("endp", None, None),
+ "scmlinkage": ("scmlinkage", None, None),
+ "fwa_rich": ("fwa", "Freshwater_Species_Count", ("quantile", 0.80, "huc12")),
+ **{k: ("ace", k, ("eq", 5)) for k in ACE_RANKS},
+ **{f"Ntv{t}": ("ace", f"Ntv{t}", ("quantile", 0.80)) for t in ACE_TAXA},
+ **{f"Rar{t}": ("ace", f"Rar{t}", ("quantile", 0.95)) for t in ACE_TAXA},
+ **{f"{t}Endem": ("ace", f"{t}Endem", ("quantile", 0.95)) for t in ACE_TAXA},
+}
+
+def connect():
+    """DuckDB connection with h3_cell_area: the h3 community extension, else an h3-py UDF."""
+    import duckdb
+    con = duckdb.connect()
+    try:
+        con.execute("INSTALL h3 FROM community"); con.execute("LOAD h3")
+    except duckdb.Error:
+        try:
+            import h3
+            con.create_function("h3_cell_area", lambda c, u: h3.cell_area(h3.int_to_str(c), u),
+                                ["UBIGINT", "VARCHAR"], "DOUBLE")
+        except ImportError:
+            pass  # only the rollup stage needs cell areas
+    return con
+
+class Engine:
+    """Overlay engine. With `rollup` (a rollup.py output dir, used by default when it exists)
+    every family is an area-weighted, CA-masked join against the precomputed per-cell
+    weights — SUM(frac*w12*area)/SUM(frac*area), system-prompt.md's method; without it,
+    the QUERIES.md method the recorded values came from. `by` breaks every family down
+    by a GROUPS dimension (needs the rollup)."""
+    def __init__(self, root=None, cache=None, datasets=None, rollup=None, by=None):
+        self.root, self.cache = root or ROOT, cache or CACHE
+        self.datasets = datasets or DATASETS
+        rollup = ROLLUP if rollup is None else rollup
+        self.rollup = rollup if rollup and glob.glob(os.path.join(rollup, "res=*", "h0=*", "data_0.parquet")) else None
+        self.by, self._con, self._built = by, None, set()
+        if by:
+            if by not in self.groups():
+                raise RuntimeError(f"no '{by}' groups in the rollup: mirror {self.datasets[GROUPS[by][0]]} "
+                                   "and run scripts/rollup.py")
+            self._grp = ", c.grp"
+        else:
+            self._grp = ""
+
+    def groups(self):
+        """{group: names} the rollup was built with (grp indexes these), or {} without a rollup."""
+        if not self.rollup: return {}
+        try:
+            with open(os.path.join(self.rollup, "_groups.json")) as f: return json.load(f)
+        except (OSError, ValueError): return {}
+
+    def weights_dir(self):
+        """The rollup tree the joins read: per cell, or per (cell, group) with `by`."""
+        return os.path.join(self.rollup, f"by={self.by}") if self.by else self.rollup
+
+    @property
+    def con(self):
+        if self._con is None: self._con = connect()
+        return self._con
+
+    def src(self, ds):
+        return f"read_parquet('{os.path.join(self.root, self.datasets[ds])}/h0=*/data_0.parquet')"
+
+    def _files(self, ds):
+        if ds == "rollup": return sorted(glob.glob(os.path.join(self.weights_dir(), "res=*", "h0=*", "data_0.parquet")))
+        return sorted(glob.glob(os.path.join(self.root, self.datasets[ds], "h0=*", "data_0.parquet")))
+
+    def version(self, *ds):
+        """Digest of every partition file (path, size, mtime) behind `ds` — the memo key."""
+        h = hashlib.sha1()
+        for d in sorted(set(ds)):
+            for p in self._files(d):
+                st = os.stat(p); h.update(f"{os.path.relpath(p, self.root)}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+        return h.hexdigest()[:16]
+
+    def memo_path(self, name, ds):
+        base = ["rollup"] if self.rollup else ["conserved"]
+        tag = ("-rollup" if self.rollup else "") + (f"-by-{self.by}" if self.by else "")
+        return os.path.join(self.cache, f"{name}{tag}-v{MEMO_SCHEMA}-{self.version(*base, *ds)}.json")
+
+    def memo(self, name, ds, fn):
+        """fn() cached as <cache>/<name>-<version>.json."""
+        path = self.memo_path(name, ds)
+        try:
+            with open(path) as f: return json.load(f)
+        except (OSError, ValueError): pass
+        out = fn()
+        os.makedirs(self.cache, exist_ok=True)
+        with open(path, "w") as f: json.dump(out, f, indent=1)
+        return out
+
+    # ---- conserved weights, built once per resolution ---------------------
+    def cons(self, res):
+        t = f"cons{res}"
+        if t in self._built: return t
+        if self.rollup:
+            q = (f"SELECT cell{', grp' if self.by else ''}, {', '.join(WEIGHTS)}, area_km2 "
+                 f"FROM read_parquet('{self.weights_dir()}/res={res}/h0=*/data_0.parquet')")
+        else:
+            # per res-10 cell first: the band indicators are of the cell's summed share
+            bands = ", ".join(f"(w >= {v})::DOUBLE AS {k}" for k, v in BAND_CUTS.items())
+            c10 = (f"(SELECT *, {bands} FROM (SELECT h0, h8, h9, h10, SUM((Final_g1_p+Final_g2_p)/100.0) AS w "
+                   f"FROM {self.src('conserved')} GROUP BY h0, h8, h9, h10))")
+            if res == 10:
+                q = f"SELECT h0, h10, w, {', '.join(BAND_CUTS)} FROM {c10}"
+            elif res == 9:   # ÷7 res-10 children per res-9
+                q = f"SELECT h0, h9, {', '.join(f'SUM({k})/7.0 AS {k}' for k in ('w', *BAND_CUTS))} FROM {c10} GROUP BY h0, h9"
+            else:            # res-8: weight-sum + the cell's actual land-cell count, never a flat 49
+                q = (f"SELECT * FROM (SELECT h0, h8, SUM(w) AS wsum, {', '.join(f'SUM({k}) AS {k}' for k in BAND_CUTS)} "
+                     f"FROM {c10} GROUP BY h0, h8) "
+                     f"FULL JOIN (SELECT h0, h8, COUNT(DISTINCT h10) AS nland FROM {self.src('cwhr13')} "
+                     f"WHERE whr13num<>0 GROUP BY h0, h8) USING (h0, h8)")
+        self.con.execute(f"CREATE TEMP TABLE {t} AS {q}")
+        self._built.add(t)
+        return t
+
+    def join(self, res, frac="frac", cap=True, inner=False):
+        """(JOIN clause, numerator terms in WEIGHTS order, denominator term) for features `f` at `res`.
+        Without the rollup, `inner` keeps only feature cells with conserved rows, as QUERIES.md §4 does."""
+        t = self.cons(res)
+        if self.rollup:   # inner join = the CA mask; rollup.py COALESCEs before LEAST, so weights are NULL-free and <= 1
+            return (f"JOIN {t} c ON c.cell = f.h{res}",
+                    [f"{frac}*c.{w}*c.area_km2" for w in WEIGHTS], f"{frac}*c.area_km2")
+        bands = [f"COALESCE(c.{k},0)" for k in BAND_CUTS]
+        if res == 8:
+            return f"LEFT JOIN {t} c USING (h0, h8)", ["COALESCE(c.wsum,0)", *bands], "COALESCE(c.nland,0)"
+        if inner:   # §4's LEAST(c.w,1.0), but a cell of all-NULL unit rows still has w NULL: 0, not 1
+            return f"JOIN {t} c USING (h0, h{res})", [f"{frac}*{x}" for x in ("LEAST(COALESCE(c.w,0),1.0)", *bands)], frac
+        w = "CASE WHEN c.w IS NULL THEN 0 ELSE LEAST(c.w,1.0) END" if cap else "COALESCE(c.w,0)"
+        return f"LEFT JOIN {t} c USING (h0, h{res})", [f"{frac}*{x}" for x in (w, *bands)], frac
+
+    def sums(self, num, den):
+        """SELECT list: the denominator right after the point numerator, then the band numerators."""
+        return ", ".join(f"SUM({x})" for x in (num[0], den, *num[1:]))
+
+    def rows(self, q):
+        return self.con.execute(q).fetchall()
+
+    def collect(self, rows, key=lambda k: k):
+        """Family result from `SELECT k[, grp], sums...` rows: {class: [...]}, or {class: {region: [...]}}."""
+        if not self.by: return {key(k): list(v) for k, *v in rows}
+        names, out = self.groups()[self.by], {}
+        for k, g, *v in rows: out.setdefault(key(k), {})[names[g]] = list(v)
+        return out
+
+    # ---- feature families, one grouped pass each -------------------------
+    def frac10(self, ds, cls):
+        """{class: [num, den]} for a res-10 hex-fractions layer (§3)."""
+        def run():
+            j, num, den = self.join(10, cap=False)
+            q = (f"SELECT k{self._grp}, {self.sums(num, den)} FROM "
+                 f"(SELECT h0, h10, {cls} AS k, frac FROM {self.src(ds)} WHERE {cls}<>0) f {j} GROUP BY k{self._grp}")
+            return self.collect(self.rows(q), str)
+        return self.memo(f"frac10-{ds}", [ds], run)
+
+    def connectivity9(self):
+        """{chn|int|diff: [num, den]} (§4), w capped at 1; without the rollup, §4's inner join."""
+        def run():
+            case = " ".join(f"WHEN connectivity_category IN {v} THEN '{k}'" for k, v in CONN_CAT.items())
+            cats = tuple(c for v in CONN_CAT.values() for c in v)
+            j, num, den = self.join(9, inner=True)
+            q = (f"SELECT k{self._grp}, {self.sums(num, den)} FROM "
+                 f"(SELECT h0, h9, CASE {case} END AS k, frac FROM {self.src('connectivity')} "
+                 f"WHERE connectivity_category IN {cats}) f {j} GROUP BY k{self._grp}")
+            return self.collect(self.rows(q))
+        return self.memo("conn9", ["connectivity"], run)
+
+    def presence10(self):
+        """{key: [num, den]} for every res-10 presence feature, one UNION ALL pass (§6)."""
+        def run():
+            feats = " UNION ALL ".join(
+                f"SELECT DISTINCT '{k}' AS k, h0, h10 FROM {self.src(ds)}" + (f" WHERE {where(w)}" if w else "")
+                for k, (ds, w) in PRESENCE10.items())
+            j, num, den = self.join(10, frac="1::DOUBLE")
+            q = f"SELECT k{self._grp}, {self.sums(num, den)} FROM ({feats}) f {j} GROUP BY k{self._grp}"
+            return self.collect(self.rows(q))
+        return self.memo("presence10", [ds for ds, _ in PRESENCE10.values()], run)
+
+    def res8(self):
+        """{key: [num, den]} for every res-8 presence/threshold feature, one pass (§5)."""
+        def sel(k, ds, col, rule):
+            s = self.src(ds)
+            if rule is None: return f"SELECT DISTINCT '{k}' AS k, h0, h8 FROM {s}"
+            if rule[0] == "eq": return f"SELECT DISTINCT '{k}' AS k, h0, h8 FROM {s} WHERE {col} = {rule[1]}"
+            units = f"(SELECT DISTINCT {rule[2]}, {col} FROM {s})" if len(rule) > 2 else s
+            return (f"SELECT DISTINCT '{k}' AS k, h0, h8 FROM {s} "
+                    f"WHERE {col} >= (SELECT quantile_cont({col}, {rule[1]}) FROM {units})")
+        def run():
+            feats = " UNION ALL ".join(sel(k, *v) for k, v in RES8.items())
+            j, num, den = self.join(8, frac="1::DOUBLE")
+            q = f"SELECT k{self._grp}, {self.sums(num, den)} FROM ({feats}) f {j} GROUP BY k{self._grp}"
+            return self.collect(self.rows(q))
+        return self.memo("res8", ["cwhr13"] + [v[0] for v in RES8.values()], run)
+
+def pct(nd):
+    n, d = nd[:2]
+    return round(100.0 * (n or 0) / d, 2) if d else None
+
+def band(nd):
+    """[Lower80, Upper20] pct of a [num, den, num_lo, num_hi] result."""
+    d = nd[1]
+    return [round(100.0 * (n or 0) / d, 2) for n in nd[2:4]] if d and len(nd) >= 4 else None
+
+def default_engine(**kw):
+    """DuckDB Engine, or the NumPy merge-join kernel over the rollup when DuckDB isn't installed."""
+    try:
+        import duckdb  # noqa: F401
+        return Engine(**kw)
+    except ImportError:
+        from hexjoin import KernelEngine
+        return KernelEngine(**kw)
+
+def reproduce(engine=None):
+    """Every reproduced value build_reproduction_record.py pairs with the report, keyed like its dicts,
+    and under "bands" each one's [Lower80, Upper20]."""
+    e = engine or default_engine()
+    if hasattr(e, "prefetch"): e.prefetch()
+    h13 = e.frac10("cwhr13", "whr13num")
+    fams = {"h13rep": {int(k): v for k, v in h13.items()},
+            "cwhr_rep": {int(k): v for k, v in e.frac10("cwhr", "whrnum").items()},
+            "conn": e.connectivity9(), "presence10": e.presence10(), "res8": e.res8()}
+    out = {f: {k: pct(v) for k, v in r.items()} for f, r in fams.items()}
+    out["bands"] = {f: {k: band(v) for k, v in r.items()} for f, r in fams.items()}
+    # composition renormalizes each numerator by its own network total
+    net = [sum((v[i] or 0) for v in h13.values()) for i in (0, 2, 3)]
+    share = lambda v, i, n: round(100.0 * (v[i] or 0) / n, 2) if n else None
+    out["h13comp"] = {int(k): share(v, 0, net[0]) for k, v in h13.items()} if net[0] else {}
+    out["bands"]["h13comp"] = {int(k): [share(v, 2, net[1]), share(v, 3, net[2])] for k, v in h13.items()} if net[0] else {}
+    return out
+
+REGIONAL = ("family", "key", "region", "pct", "lower80", "upper20", "extent_km2")
+
+def regional(by, engine=None):
+    """Every family broken down by GROUPS dimension `by`, as one sparse table: a row per
+    (family, key, region) with land in both, pct with its [Lower80, Upper20] band, and the
+    feature's extent in the region (km², the denominator)."""
+    e = engine or default_engine(by=by)
+    if getattr(e, "by", None) != by: raise ValueError(f"engine is grouped by {e.by!r}, not {by!r}")
+    if hasattr(e, "prefetch"): e.prefetch()
+    fams = {"h13rep": e.frac10("cwhr13", "whr13num"), "cwhr_rep": e.frac10("cwhr", "whrnum"),
+            "conn": e.connectivity9(), "presence10": e.presence10(), "res8": e.res8()}
+    rows = [[f, k, g, pct(v), *(band(v) or [None, None]), round(v[1], 3)]
+            for f, r in fams.items() for k, regions in r.items() for g, v in regions.items() if v[1]]
+    rows.sort(key=lambda r: (r[0], str(r[1]), r[2]))
+    return {"by": by, "regions": e.groups()[by], "columns": list(REGIONAL), "rows": rows}
@@ -0,0 +1,259 @@
+"""Sorted-merge H3 overlay kernel in NumPy — the DuckDB-free path over rollup.py's output.
+
+Features and rollup are both partitioned by h0, so the join streams one partition pair at
+a time: the rollup side is a sorted uint64 `cell` array, each feature row finds its cell
+with `searchsorted`, and `frac × w × area` numerators — one per WEIGHTS column, the point
+estimate and the Lower80 / Upper20 band, from a single bincount — and `frac × area`
+denominators are accumulated into fixed-size per-class arrays. Peak memory is one partition;
+the class codes and quantile thresholds Families need are merged partition by partition
+as distinct-value counts, never a whole column.
+
+NULL safety is structural rather than a guard to remember: rollup weights are COALESCEd
+before they are capped at build time (an all-NULL cell is 0, not LEAST(NULL,1) = 1), a feature cell with no rollup row is outside the California
+grid and is dropped (never scored as conserved — the `LEAST(NULL,1)` trap), and NULL
+frac / class values contribute nothing.
+
+Grouped (Engine `by`), the rollup side is the per-(cell, group) table: a cell on a region
+border has one row per region, each feature row is repeated across them, and the slots
+become (label, region) pairs — the whole feature × region matrix in the same pass.
+
+An overlay is described by a plain-data Family (picklable, so schedule.py can ship
+(family, partition) tasks to worker processes); overlay_partition() is the unit of work."""
+import glob, os
+from collections import namedtuple
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from hexengine import CONN_CAT, MEMO_SCHEMA, PRESENCE10, RES8, WEIGHTS, Engine
+
+# name: unique task-family id · path: feature dataset dir · labels: output classes
+# classify: spec, see classifier() · columns: extra columns classify/filters read
+# frac: coverage column, or None for presence (frac = 1) · distinct: one count per (label, cell)
+Family = namedtuple("Family", "name path res labels classify columns frac filters distinct")
+
+def partitions(d):
+    """{'h0=…': path} for a hive-partitioned hex dataset directory."""
+    return {os.path.basename(os.path.dirname(p)): p for p in sorted(glob.glob(os.path.join(d, "h0=*", "data_0.parquet")))}
+
+def read_rollup(path, grouped=False):
+    """(sorted cells, [cells × WEIGHTS] weight matrix, land area, group index or None)."""
+    t = pq.read_table(path, columns=["cell", *(["grp"] if grouped else []), *WEIGHTS, "area_km2"])
+    return (t["cell"].to_numpy().astype(np.uint64, copy=False),
+            np.column_stack([t[w].to_numpy() for w in WEIGHTS]), t["area_km2"].to_numpy(),
+            t["grp"].to_numpy() if grouped else None)
+
+def match(cells, q):
+    """Row of each id of `q` in the sorted `cells`, or -1 where it isn't there."""
+    if not len(cells): return np.full(len(q), -1)
+    i = np.searchsorted(cells, q)
+    i[i == len(cells)] = 0
+    return np.where(cells[i] == q, i, -1)
+
+def expand(cells, q):
+    """(q index, cells index) of every equal pair — `match` for a sorted `cells` with repeats."""
+    lo, hi = np.searchsorted(cells, q, "left"), np.searchsorted(cells, q, "right")
+    n = hi - lo
+    qi = np.repeat(np.arange(len(q)), n)
+    return qi, np.repeat(lo - (np.cumsum(n) - n), n) + np.arange(len(qi))
+
+def _expr(filters):
+    e = None
+    for c, op, v in filters or ():
+        f = pc.field(c).isin(list(v)) if op == "in" else {"=": pc.field(c) == v, "!=": pc.field(c) != v,
+             ">=": pc.field(c) >= v, ">": pc.field(c) > v, "<=": pc.field(c) <= v, "<": pc.field(c) < v}[op]
+        e = f if e is None else e & f
+    return e
+
+def classifier(spec):
+    """classify(table) -> (rows, k): row indices of the partition table and each one's label
+    index (a row may repeat under several labels; unclassified rows are simply absent).
+      ("all",)                      every row is label 0
+      ("code", col, codes, label)   integer class column; codes[j] -> label index label[j]
+      ("cuts", [(col, op, v) | None per label])   label j where col op v ('=' or '>=')"""
+    if spec[0] == "all":
+        return lambda t: (np.arange(t.num_rows), np.zeros(t.num_rows, np.int64))
+    if spec[0] == "code":
+        _, col, codes, label = spec
+        order = np.argsort(codes)
+        codes, label = np.asarray(codes)[order], np.asarray(label)[order]
+        def classify(t):
+            v = t[col].fill_null(-1).to_numpy(zero_copy_only=False)
+            i = np.clip(np.searchsorted(codes, v), 0, len(codes) - 1)
+            rows = np.flatnonzero(codes[i] == v)
+            return rows, label[i[rows]]
+        return classify
+    def classify(t):
+        rows, ks = [], []
+        for j, cut in enumerate(spec[1]):
+            if cut is None: r = np.arange(t.num_rows)
+            else:
+                col, op, v = cut
+                x = t[col].to_numpy(zero_copy_only=False).astype(float)
+                r = np.flatnonzero(x == v if op == "=" else x >= v)
+            rows.append(r); ks.append(np.full(len(r), j))
+        return np.concatenate(rows), np.concatenate(ks)
+    return classify
+
+def feature_rows(fam, part):
+    """(cell, label index, frac) of one h0 partition's classified feature rows; empty if none."""
+    fpath = os.path.join(fam.path, part, "data_0.parquet")
+    none = np.array([], np.uint64), np.array([], np.int64), np.array([])
+    if not os.path.exists(fpath): return none
+    cols = sorted({f"h{fam.res}", *fam.columns, *([fam.frac] if fam.frac else [])})
+    t = pq.read_table(fpath, columns=cols, filters=_expr(fam.filters))
+    if not t.num_rows: return none
+    rows, k = classifier(fam.classify)(t)
+    cell = t[f"h{fam.res}"].to_numpy(zero_copy_only=False).astype(np.uint64)[rows]
+    f = t[fam.frac].fill_null(0).to_numpy(zero_copy_only=False)[rows] if fam.frac else np.ones(len(rows))
+    if fam.distinct:
+        _, first = np.unique(np.stack([k.astype(np.uint64), cell]), axis=1, return_index=True)
+        cell, k, f = cell[first], k[first], f[first]
+    return cell, k, f
+
+def overlay_partition(fam, part, rollup, ngroups=None):
+    """(num, den) over fam.labels for one h0 partition; num has one row per WEIGHTS column.
+    With `ngroups` (rollup = a by=<group> tree) the columns are label-major (label, group) slots."""
+    n, nw = len(fam.labels) * (ngroups or 1), len(WEIGHTS)
+    num, den = np.zeros((nw, n)), np.zeros(n)
+    rpath = os.path.join(rollup, f"res={fam.res}", part, "data_0.parquet")
+    if not os.path.exists(rpath): return num, den   # outside California
+    cell, k, f = feature_rows(fam, part)
+    if not len(cell): return num, den
+    rc, w, a, g = read_rollup(rpath, grouped=bool(ngroups))
+    if ngroups:
+        r, i = expand(rc, cell)
+        k, f = k[r] * ngroups + g[i], f[r]
+    else:
+        i = match(rc, cell)
+        keep = i >= 0
+        i, k, f = i[keep], k[keep], f[keep]
+    fa = f * a[i]
+    # all numerators in one bincount over (label, weighting) slots
+    slot = (k[:, None] * nw + np.arange(nw)).ravel()
+    num += np.bincount(slot, weights=(fa[:, None] * w[i]).ravel(), minlength=n * nw).reshape(n, nw).T
+    den += np.bincount(k, weights=fa, minlength=n)
+    return num, den
+
+def as_dict(fam, num, den, names=None):
+    """{label: [num, den, num_lo, num_hi]}, Engine's result shape; with group `names`,
+    {label: {region: [...]}} over the regions where the label has land."""
+    cell = lambda j: [float(num[0, j]), float(den[j]), *map(float, num[1:, j])]
+    if names is None: return {lab: cell(j) for j, lab in enumerate(fam.labels)}
+    G = len(names)
+    return {lab: {names[g]: cell(j * G + g) for g in range(G) if den[j * G + g]} for j, lab in enumerate(fam.labels)}
+
+def overlay(fam, rollup, names=None):
+    """{label: [num, den]} for a Family, one partition at a time in this process."""
+    n = len(fam.labels) * (len(names) if names is not None else 1)
+    num, den = np.zeros((len(WEIGHTS), n)), np.zeros(n)
+    for part in partitions(fam.path):
+        pn, pd = overlay_partition(fam, part, rollup, len(names) if names is not None else None)
+        num += pn; den += pd
+    return as_dict(fam, num, den, names)
+
+def _merge(acc, v, c):
+    vals, inv = np.unique(np.concatenate([acc[0], v]), return_inverse=True)
+    return vals, np.bincount(inv.ravel(), weights=np.concatenate([acc[1], c]), minlength=len(vals)).astype(np.int64)
+
+def value_counts(feature, col):
+    """(sorted distinct values, counts) of one column, merged partition by partition."""
+    acc = None
+    for p in partitions(feature).values():
+        v, c = np.unique(pq.read_table(p, columns=[col])[col].drop_null().to_numpy(zero_copy_only=False), return_counts=True)
+        acc = (v, c) if acc is None else _merge(acc, v, c)
+    return acc if acc is not None else (np.array([]), np.array([], np.int64))
+
+def unit_value_counts(feature, unit, col):
+    """value_counts of `col` once per distinct (unit, col) pair — e.g. a HUC12's count, not once
+    per cell; only the distinct pairs seen so far are held, not the cells."""
+    seen = None
+    for p in partitions(feature).values():
+        t = pq.read_table(p, columns=[unit, col]).group_by([unit, col]).aggregate([])
+        seen = t if seen is None else pa.concat_tables([seen, t]).group_by([unit, col]).aggregate([])
+    if seen is None: return np.array([]), np.array([], np.int64)
+    return np.unique(seen[col].drop_null().to_numpy(zero_copy_only=False), return_counts=True)
+
+def quantile(vals, counts, q):
+    """np.quantile (linear, = DuckDB quantile_cont) of the multiset vals × counts; inf if empty."""
+    n = int(counts.sum())
+    if not n: return np.inf
+    cum, pos = np.cumsum(counts), q * (n - 1)
+    at = lambda i: float(vals[np.searchsorted(cum, i, side="right")])
+    lo, hi = at(np.floor(pos)), at(np.ceil(pos))
+    return lo + (hi - lo) * (pos - np.floor(pos))
+
+class KernelEngine(Engine):
+    """Engine whose feature families run through the kernel instead of DuckDB; needs a rollup.
+    workers > 1 runs the (family, partition) tasks through schedule.py's process pool."""
+    def __init__(self, workers=None, **kw):
+        super().__init__(**kw)
+        if not self.rollup: raise RuntimeError("KernelEngine needs a rollup (run scripts/rollup.py)")
+        self.workers = workers
+        self._specs = None
+
+    def path(self, ds):
+        return os.path.join(self.root, self.datasets[ds])
+
+    def specs(self):
+        """memo name -> (datasets it reads, the Families it is made of)."""
+        if self._specs is not None: return self._specs
+        out = {}
+        for ds, cls in (("cwhr13", "whr13num"), ("cwhr", "whrnum")):
+            codes = [c for c in value_counts(self.path(ds), cls)[0].tolist() if c != 0]
+            out[f"frac10-{ds}"] = ([ds], [Family(f"frac10-{ds}", self.path(ds), 10, [str(c) for c in codes],
+                                   ("code", cls, codes, list(range(len(codes)))), [cls], "frac", [(cls, "!=", 0)], False)]
+                                   if codes else [])   # only class 0 (or no rows): nothing to classify
+        codes = [c for v in CONN_CAT.values() for c in v]
+        label = [j for j, v in enumerate(CONN_CAT.values()) for _ in v]
+        out["conn9"] = (["connectivity"], [Family("conn9", self.path("connectivity"), 9, list(CONN_CAT),
+                        ("code", "connectivity_category", codes, label), ["connectivity_category"], "frac", None, False)])
+        out["presence10"] = ([ds for ds, _ in PRESENCE10.values()],
+                             [Family(f"presence10-{k}", self.path(ds), 10, [k], ("all",),
+                                     [c for c, _, _ in filters or ()], None, filters, True)
+                              for k, (ds, filters) in PRESENCE10.items()])
+        by_ds = {}
+        for k, (ds, col, rule) in RES8.items(): by_ds.setdefault(ds, []).append((k, col, rule))
+        fams = []
+        for ds, feats in by_ds.items():   # one Family per dataset covers all its keys (all 19 ACE ones)
+            cuts = []
+            for k, col, rule in feats:
+                if rule is None: cuts.append(None); continue
+                if rule[0] == "eq": cuts.append((col, "=", rule[1])); continue
+                vc = unit_value_counts(self.path(ds), rule[2], col) if len(rule) > 2 else value_counts(self.path(ds), col)
+                cuts.append((col, ">=", quantile(*vc, rule[1])))
+            fams.append(Family(f"res8-{ds}", self.path(ds), 8, [k for k, _, _ in feats], ("cuts", cuts),
+                               sorted({c for c in (f[1] for f in feats) if c}), None, None, True))
+        out["res8"] = (["cwhr13"] + [v[0] for v in RES8.values()], fams)
+        self._specs = out
+        return out
+
+    def run(self, fams):
+        """{family name: {label: [num, den]}} — serial, or fanned out when workers > 1."""
+        names = self.groups()[self.by] if self.by else None
+        if self.workers and self.workers > 1:
+            from schedule import run
+            key = self.version("rollup", *{d for ds, _ in self.specs().values() for d in ds})
+            return run(fams, self.weights_dir(), workers=self.workers, names=names,
+                       key=f"v{MEMO_SCHEMA}-" + (f"by-{self.by}-" if self.by else "") + key)
+        return {f.name: overlay(f, self.weights_dir(), names) for f in fams}
+
+    def _family(self, name, done=None):
+        ds, fams = self.specs()[name]
+        def run():
+            res = done if done is not None else self.run(fams)
+            return {lab: v for f in fams for lab, v in res[f.name].items()}
+        return self.memo(name, ds, run)
+
+    def prefetch(self):
+        """Compute every family not yet memoized as one batch, so a process pool sees all the
+        (family, partition) tasks at once instead of one family at a time."""
+        todo = [n for n, (ds, _) in self.specs().items() if not os.path.exists(self.memo_path(n, ds))]
+        if not todo: return
+        done = self.run([f for n in todo for f in self.specs()[n][1]])
+        for n in todo: self._family(n, done)
+
+    def frac10(self, ds, cls): return self._family(f"frac10-{ds}")
+    def connectivity9(self): return self._family("conn9")
+    def presence10(self): return self._family("presence10")
+    def res8(self): return self._family("res8")
@@ -0,0 +1,85 @@
+"""Dependency-tracked, incremental rewrite of extraction_record.json / reproduction_record.json.
+
+Every entry is put() with the summary-CSV rows (name:key) and constants it came from.
+Their digest goes to a `<record>.deps.json` sidecar; on the next build an entry whose
+inputs (and generator script) are unchanged is reused verbatim from the existing record,
+everything else is rebuilt, and the record is patched in place — same order, same ids —
+with a per-entry diff summary printed instead of a whole-file rewrite to review.
+Pass --full to ignore the sidecar."""
+import hashlib, json, os, sys
+from summaries import load
+
+def digest(obj):
+    s = json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(s.encode()).hexdigest()[:16]
+
+def _keyed(entries):
+    """{key: entry} with repeated ids (e.g. the eco_<6-char> ids) disambiguated as id#2, id#3..."""
+    out, seen = {}, {}
+    for e in entries:
+        n = seen[e["id"]] = seen.get(e["id"], 0) + 1
+        out[e["id"] if n == 1 else f"{e['id']}#{n}"] = e
+    return out
+
+def _file_digest(path):
+    with open(path, "rb") as f: return hashlib.sha1(f.read()).hexdigest()[:16]
+
+class Record:
+    def __init__(self, path, list_key, script=None, full=None):
+        self.path, self.list_key = path, list_key
+        self.deps_path = os.path.splitext(path)[0] + ".deps.json"
+        full = "--full" in sys.argv if full is None else full
+        try:
+            with open(path) as f: self.old_doc = json.load(f)
+        except (OSError, ValueError): self.old_doc = {}
+        self.old = _keyed(self.old_doc.get(list_key, []))
+        try:
+            with open(self.deps_path) as f: old_deps = json.load(f)
+        except (OSError, ValueError): old_deps = {}
+        self.script = _file_digest(script) if script else None
+        if full or old_deps.get("script") != self.script: old_deps = {}
+        self.old_deps = old_deps.get("entries", {})
+        self.deps, self.entries, self._used, self._seen = {}, [], [], {}
+        self.reused = self.rebuilt = 0
+
+    def use(self, name, key):
+        """Note a summary-CSV row read for the entry about to be put()."""
+        self._used.append((name, key))
+
+    def put(self, eid, build, src=(), const=None):
+        """Entry `eid` = build(), unless its inputs match the last build's."""
+        n = self._seen[eid] = self._seen.get(eid, 0) + 1
+        eid = eid if n == 1 else f"{eid}#{n}"
+        src = sorted(set(src) | set(self._used)); self._used = []
+        refs = [f"{n}:{k}" for n, k in src]
+        d = digest({"rows": [load(n).get(k) for n, k in src], "const": const})
+        prev = self.old_deps.get(eid)
+        if prev and prev["digest"] == d and eid in self.old:
+            e = self.old[eid]; self.reused += 1
+        else:
+            e = build(); self.rebuilt += 1
+        self.deps[eid] = {"inputs": refs, "digest": d}
+        self.entries.append(e)
+        return e
+
+    def write(self, doc):
+        """Patch the record with `doc` (whose list_key holds the put() entries) and report."""
+        new = _keyed(doc[self.list_key])
+        added = [i for i in new if i not in self.old]
+        removed = [i for i in self.old if i not in new]
+        changed = [i for i in new if i in self.old and new[i] != self.old[i]]
+        meta = [k for k in set(doc) | set(self.old_doc)
+                if k != self.list_key and doc.get(k) != self.old_doc.get(k)]
+        if added or removed or changed or meta or list(new) != list(self.old):
+            with open(self.path, "w") as f: json.dump(doc, f, indent=2)
+        with open(self.deps_path, "w") as f:
+            json.dump({"script": self.script, "entries": self.deps}, f, indent=1, sort_keys=True)
+        print(f"{self.path}: {len(new)} entries ({self.reused} reused, {self.rebuilt} rebuilt) — "
+              f"{len(changed)} changed, {len(added)} added, {len(removed)} removed"
+              + (f"; header: {', '.join(sorted(meta))}" if meta else ""))
+        for i in changed:
+            a, b = self.old[i], new[i]
+            diffs = [f"{k}: {a.get(k)!r} -> {b.get(k)!r}" for k in dict.fromkeys([*a, *b]) if a.get(k) != b.get(k)]
+            print(f"  ~ {i}  " + "; ".join(diffs))
+        for i in added: print(f"  + {i}  {new[i].get('label', '')}")
+        for i in removed: print(f"  - {i}  {self.old[i].get('label', '')}")
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Caching / record-replay proxy in front of the duckdb-geo MCP endpoint (`mcp_url`).
+
+    python scripts/mcpcache.py [--mode cache|record|replay] [--port 8766] [--cap-mb 512]
+    python scripts/headless.py --mcp http://localhost:8766/mcp ...
+
+Every `tools/call` is keyed by sha1(tool, normalized arguments, dataset version): SQL
+arguments are normalized (comments dropped, whitespace collapsed, unquoted text
+lowercased, trailing `;` removed), so the same overlay typed two ways is one entry.
+The dataset version (or --dataset-version) is a sha1 over the STAC tree: the catalog and
+every child catalog, collection and item document, plus the ETag / Last-Modified / length
+a HEAD returns for each http(s) asset they link (asset bodies are never downloaded), so
+re-publishing data inside an existing collection changes it. Data files STAC does not
+link (e.g. a hex prefix behind one asset href) are invisible to it: pass
+--dataset-version after refreshing those. If any of the tree can't be read the proxy
+reuses the version it last stored, with a warning, or refuses to start when there is
+none; it never caches under a guess. Replay reuses the version last recorded. Results
+live in a SQLite file, evicted least-recently-used once they exceed --cap-mb.
+
+  cache   serve hits, forward and store misses (default)
+  record  always forward, store every result
+  replay  never touch the network: serve hits, answer misses with a JSON-RPC error
+
+tools/list is recorded too, so replay serves a whole benchmark offline. Hits, misses,
+hit rate and the upstream latency hits saved are printed on exit and served at /stats."""
+import argparse, hashlib, json, os, re, signal, sqlite3, sys, threading, time, urllib.request, uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from headless import REPO, _events, _mcp_url, _post
+
+CACHE = os.environ.get("MCP_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "ca30x30-mcp.sqlite"))
+SQL_ARGS = ("sql_query", "sql", "query")
+_TOKENS = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/|\s+|[^'\"\s/-]+|.", re.S)
+
+def normalize_sql(sql):
+    """Canonical text of a query: same statement typed differently -> same string."""
+    out = []
+    for t in _TOKENS.findall(sql):
+        if t.startswith(("--", "/*")) or t.isspace():
+            if out and out[-1] != " ": out.append(" ")
+        elif t[0] in "'\"": out.append(t)
+        else: out.append(t.lower())
+    return "".join(out).strip().rstrip(";").strip()
+
+def normalize_args(args):
+    return {k: normalize_sql(v) if k in SQL_ARGS and isinstance(v, str) else v for k, v in sorted(args.items())}
+
+def _get(url):
+    with urllib.request.urlopen(url, timeout=30) as r: return r.read()
+
+def _validators(url):
+    """ETag / Last-Modified / Content-Length of an asset: a HEAD, never its (possibly GB) body."""
+    with urllib.request.urlopen(urllib.request.Request(url, method="HEAD"), timeout=30) as r:
+        return "|".join(r.headers.get(h) or "" for h in ("ETag", "Last-Modified", "Content-Length"))
+
+def dataset_version(catalog, workers=16):
+    """sha1 over the STAC tree under `catalog` (see module doc); raises if any of it is unreadable."""
+    from concurrent.futures import ThreadPoolExecutor
+    from urllib.parse import urljoin
+    h, docs, assets, todo = hashlib.sha1(), {}, set(), {catalog}
+    with ThreadPoolExecutor(workers) as pool:
+        while todo:   # one level of catalogs / collections / items at a time
+            batch = sorted(todo)
+            docs.update(zip(batch, pool.map(_get, batch)))
+            todo = set()
+            for url in batch:
+                try: doc = json.loads(docs[url])
+                except ValueError: continue
+                for link in doc.get("links", []):
+                    if link.get("rel") in ("child", "item"): todo.add(urljoin(url, link.get("href", "")))
+                hrefs = [urljoin(url, a.get("href", "")) for a in (doc.get("assets") or {}).values() if isinstance(a, dict)]
+                assets.update(a for a in hrefs if a.startswith(("http://", "https://")))   # s3:// etc. can't be HEADed
+            todo -= docs.keys()
+        for url in sorted(docs): h.update(f"{url}\n".encode() + docs[url])
+        assets = sorted(assets)
+        for u, v in zip(assets, pool.map(_validators, assets)): h.update(f"{u}={v}\n".encode())
+    return h.hexdigest()[:16]
+
+class Store:
+    """SQLite LRU: key -> result JSON, with the upstream latency it cost to produce."""
+    def __init__(self, path=CACHE, cap=512 << 20):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, method TEXT, args TEXT,
+            result TEXT, bytes INTEGER, latency_s REAL, created REAL, used REAL)""")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT)")
+        self.cap, self.lock = cap, threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            row = self.db.execute("SELECT result, latency_s FROM entries WHERE key=?", (key,)).fetchone()
+            if row:
+                self.db.execute("UPDATE entries SET used=? WHERE key=?", (time.time(), key)); self.db.commit()
+        return (json.loads(row[0]), row[1]) if row else (None, None)
+
+    def put(self, key, method, args, result, latency):
+        blob, now = json.dumps(result), time.time()
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?,?,?)",
+                            (key, method, json.dumps(args), blob, len(blob), latency, now, now))
+            total = self.db.execute("SELECT COALESCE(SUM(bytes),0) FROM entries").fetchone()[0]
+            for k, n in self.db.execute("SELECT key, bytes FROM entries ORDER BY used").fetchall():
+                if total <= self.cap: break
+                self.db.execute("DELETE FROM entries WHERE key=?", (k,)); total -= n
+            self.db.commit()
+
+    def meta(self, k, v=None):
+        with self.lock:
+            if v is not None:
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES (?,?)", (k, v)); self.db.commit(); return v
+            row = self.db.execute("SELECT v FROM meta WHERE k=?", (k,)).fetchone()
+        return row[0] if row else None
+
+class Proxy:
+    def __init__(self, upstream, store, mode="cache", version="unversioned"):
+        self.upstream, self.store, self.mode, self.version = upstream, store, mode, version
+        self.stats = {"hits": 0, "misses": 0, "forwarded": 0, "errors": 0, "saved_s": 0.0, "upstream_s": 0.0}
+        self.lock = threading.Lock()
+
+    def key(self, method, params):
+        if method == "tools/list": body = {"m": method}
+        else: body = {"m": method, "tool": params.get("name"), "args": normalize_args(params.get("arguments") or {})}
+        return hashlib.sha1(json.dumps({**body, "v": self.version}, sort_keys=True).encode()).hexdigest()
+
+    def bump(self, **kw):
+        with self.lock:
+            for k, v in kw.items(): self.stats[k] += v
+
+    def forward(self, body, headers):
+        """Upstream JSON-RPC response (JSON or SSE) -> (message or None, session id, seconds)."""
+        t0 = time.monotonic()
+        with _post(self.upstream, body, headers) as resp:
+            session = resp.headers.get("Mcp-Session-Id")
+            if "id" not in body: return None, session, time.monotonic() - t0
+            if "text/event-stream" in resp.headers.get("Content-Type", ""):
+                msgs = [json.loads(d) for d in _events(resp)]
+                msg = next((m for m in msgs if m.get("id") == body["id"]), msgs[-1] if msgs else {})
+            else:
+                msg = json.load(resp)
+        return msg, session, time.monotonic() - t0
+
+    def handle(self, body, headers):
+        """(response message or None for a notification, session id to return)."""
+        method, rid, params = body.get("method"), body.get("id"), body.get("params") or {}
+        cacheable = method in ("tools/call", "tools/list")
+        k = self.key(method, params) if cacheable else None
+        if cacheable and self.mode != "record":
+            result, latency = self.store.get(k)
+            if result is not None:
+                self.bump(hits=1, saved_s=latency or 0.0)
+                return {"jsonrpc": "2.0", "id": rid, "result": result}, headers.get("Mcp-Session-Id")
+        if self.mode == "replay":
+            if cacheable: self.bump(misses=1)
+            if method == "initialize":
+                res = {"protocolVersion": params.get("protocolVersion", "2025-03-26"), "capabilities": {"tools": {}},
+                       "serverInfo": {"name": "mcpcache-replay", "version": self.version}}
+                return {"jsonrpc": "2.0", "id": rid, "result": res}, uuid.uuid4().hex
+            if rid is None: return None, headers.get("Mcp-Session-Id")
+            return ({"jsonrpc": "2.0", "id": rid, "error": {"code": -32000, "message": f"not recorded: {method}"}},
+                    headers.get("Mcp-Session-Id"))
+        if cacheable: self.bump(misses=1)
+        msg, session, dt = self.forward(body, headers)
+        self.bump(forwarded=1, upstream_s=dt)
+        if cacheable and msg and "result" in msg and not msg["result"].get("isError"):
+            self.store.put(k, method, params, msg["result"], dt)
+        elif cacheable: self.bump(errors=1)
+        return msg, session
+
+    def report(self):
+        s = dict(self.stats); n = s["hits"] + s["misses"]
+        s["hit_rate"] = round(s["hits"] / n, 4) if n else None
+        return s
+
+def handler(proxy):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        def log_message(self, *a): pass
+
+        def _send(self, status, obj=None, session=None):
+            body = json.dumps(obj).encode() if obj is not None else b""
+            self.send_response(status)
+            if obj is not None: self.send_header("Content-Type", "application/json")
+            if session: self.send_header("Mcp-Session-Id", session)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers(); self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/stats"): return self._send(200, proxy.report())
+            self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            headers = {"Accept": "application/json, text/event-stream"}
+            if self.headers.get("Mcp-Session-Id"): headers["Mcp-Session-Id"] = self.headers["Mcp-Session-Id"]
+            try: msg, session = proxy.handle(body, headers)
+            except Exception as e:
+                msg, session = {"jsonrpc": "2.0", "id": body.get("id"),
+                                "error": {"code": -32603, "message": f"upstream: {e}"}}, None
+            if msg is None: return self._send(202, session=session)
+            self._send(200, msg, session)
+    return Handler
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--upstream", default=os.environ.get("MCP_URL", _mcp_url()))
+    ap.add_argument("--mode", choices=("cache", "record", "replay"), default="cache")
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--db", default=CACHE)
+    ap.add_argument("--cap-mb", type=float, default=512)
+    ap.add_argument("--dataset-version", help="default: sha1 of the STAC tree (layers-input.json); "
+                    "required after refreshing data STAC doesn't link")
+    a = ap.parse_args(argv)
+    store = Store(a.db, int(a.cap_mb * (1 << 20)))
+    version = a.dataset_version
+    if not version and a.mode == "replay":   # offline: replay what was last recorded
+        version = store.meta("dataset_version") or "unversioned"
+    elif not version:
+        with open(os.path.join(REPO, "layers-input.json")) as f: catalog = json.load(f)["catalog"]
+        try: version = dataset_version(catalog)
+        except Exception as e:   # never a made-up version: that would drop the cache on a network blip
+            version = store.meta("dataset_version")
+            if not version: sys.exit(f"mcpcache: can't version the data from {catalog} ({e}); pass --dataset-version")
+            print(f"mcpcache: warning: can't version the data from {catalog} ({e}); reusing the last version, {version}",
+                  file=sys.stderr)
+    if a.mode != "replay": store.meta("dataset_version", version)
+    proxy = Proxy(a.upstream, store, a.mode, version)
+    srv = ThreadingHTTPServer(("127.0.0.1", a.port), handler(proxy))
+    srv.daemon_threads = True
+    def stop(*_):
+        print(json.dumps(proxy.report()), file=sys.stderr); sys.exit(0)
+    signal.signal(signal.SIGTERM, stop); signal.signal(signal.SIGINT, stop)
+    print(f"mcpcache [{a.mode}, dataset {version}] http://127.0.0.1:{a.port}/mcp -> {a.upstream}", file=sys.stderr)
+    srv.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Local stand-in for the /api/llm endpoint and the duckdb-geo MCP server, for exercising
+headless.py without a network or key.
+
+    python scripts/mockllm.py [--port 8765] [--delay 0.05]
+    python scripts/headless.py --endpoint http://localhost:8765/api/llm --mcp http://localhost:8765/mcp
+
+/api/llm/chat/completions streams OpenAI-style SSE: the first turn of a question asks
+for one `query` tool call, the next turn answers with the answer key's value in the
+bold-headline form the scorecard extracts, and usage reports prompt / cached /
+completion tokens. /mcp speaks just enough streamable-HTTP MCP (initialize, tools/list,
+tools/call) to return a canned result. --delay sleeps per streamed chunk so latency
+and concurrency behave like a slow model."""
+import argparse, json, os, time, uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+KEY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "report_qa_answer_key.json")
+
+def load_answers(path=KEY):
+    with open(path) as f: return {k["q"]: k for k in json.load(f)["questions"]}
+
+def headline(k):
+    a = k["answer"] if k else None
+    if isinstance(a, (int, float)):
+        return f"**{a:,.0f} acres**" if k["unit"] == "acres" else f"**{a:g}%**"
+    return f"**{a}**" if a else "I could not compute that."
+
+class Handler(BaseHTTPRequestHandler):
+    answers, delay = {}, 0.0
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *a): pass
+
+    def _json(self, obj, headers=None, status=200):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items(): self.send_header(k, v)
+        self.end_headers(); self.wfile.write(body)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path.rstrip("/").endswith("/chat/completions"): return self.chat(body)
+        if self.path.rstrip("/").endswith("/mcp"): return self.mcp(body)
+        self._json({"error": "not found"}, status=404)
+
+    def chat(self, body):
+        msgs = body.get("messages", [])
+        question = next((m["content"] for m in msgs if m.get("role") == "user"), "")
+        prompt = sum(len(str(m.get("content") or "")) for m in msgs) // 4
+        asked = any(m.get("role") == "tool" for m in msgs)
+        if body.get("tools") and not asked:
+            sql = "SELECT SUM(Acres) / 101.5e6 FROM read_parquet('s3://public-ca30x30/...')"
+            chunks = [{"tool_calls": [{"index": 0, "id": f"call_{uuid.uuid4().hex[:8]}", "type": "function",
+                                       "function": {"name": "query", "arguments": ""}}]},
+                      {"tool_calls": [{"index": 0, "function": {"arguments": json.dumps({"sql_query": sql})}}]}]
+            out = 24
+        else:
+            text = f"The answer is {headline(self.answers.get(question))}."
+            chunks = [{"content": w + " "} for w in text.split(" ")]
+            out = len(chunks)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for d in chunks:
+            time.sleep(self.delay)
+            self.wfile.write(f"data: {json.dumps({'choices': [{'index': 0, 'delta': d}]})}\n\n".encode())
+            self.wfile.flush()
+        usage = {"prompt_tokens": prompt, "completion_tokens": out,
+                 "prompt_tokens_details": {"cached_tokens": prompt * 4 // 5 if asked else 0},
+                 "completion_tokens_details": {"reasoning_tokens": out // 2}, "cost": 1e-6 * (prompt + 10 * out)}
+        self.wfile.write(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\ndata: [DONE]\n\n".encode())
+        self.close_connection = True
+
+    def mcp(self, body):
+        method, rid = body.get("method"), body.get("id")
+        if rid is None:
+            self.send_response(202); self.send_header("Content-Length", "0"); self.end_headers(); return
+        if method == "initialize":
+            res = {"protocolVersion": "2025-03-26", "capabilities": {"tools": {}},
+                   "serverInfo": {"name": "mock-duckdb-geo", "version": "0"}}
+            return self._json({"jsonrpc": "2.0", "id": rid, "result": res}, {"Mcp-Session-Id": uuid.uuid4().hex})
+        if method == "tools/list":
+            res = {"tools": [{"name": "query", "description": "Run DuckDB SQL against the data catalog.",
+                              "inputSchema": {"type": "object", "properties": {"sql_query": {"type": "string"}},
+                                              "required": ["sql_query"]}}]}
+        elif method == "tools/call":
+            time.sleep(self.delay)
+            res = {"content": [{"type": "text", "text": "| pct |\n|---|\n| 26.1 |"}]}
+        else:
+            return self._json({"jsonrpc": "2.0", "id": rid, "error": {"code": -32601, "message": method}})
+        self._json({"jsonrpc": "2.0", "id": rid, "result": res})
+
+def serve(port=8765, delay=0.0, key=KEY):
+    Handler.answers, Handler.delay = load_answers(key), delay
+    srv = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    srv.daemon_threads = True
+    return srv
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--delay", type=float, default=0.0)
+    ap.add_argument("--key", default=KEY)
+    a = ap.parse_args()
+    print(f"mock /api/llm + /mcp on http://127.0.0.1:{a.port}")
+    serve(a.port, a.delay, a.key).serve_forever()
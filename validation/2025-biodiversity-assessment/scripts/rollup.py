@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Materialize the per-resolution conserved-weight / land-area rollup that every overlay starts from.
+
+One pass per h0 partition of the California land grid (`ca30x30-ecoregion` hex, which is
+also the mask) LEFT JOINed to the raw conserved-areas hex inventory, written as
+
+    <ROLLUP_ROOT>/res={10,9,8}/h0=<h0>/data_0.parquet
+        cell UBIGINT (sorted), w12, w12_lo, w12_hi, w34, area_km2, nland
+
+w12 / w34 = the GAP 1+2 / GAP 3+4 share of the cell's land, area-weighted over its res-10
+land children (0 where no unit, never NULL; capped at 1); w12_lo / w12_hi = the share of
+that land in res-10 cells at least 80% / 20% GAP 1+2 (the report's Lower80 / Upper20
+band, hexengine.BAND_CUTS); area_km2 = h3_cell_area summed
+over those children; nland = their count. A feature overlay is then a join against a small
+sorted table: SUM(frac*w12*area_km2) / SUM(frac*area_km2).
+
+For each grouping layer in hexengine.GROUPS that is mirrored (the ecoregion grid's own
+region column, county hex), the same columns are also written per (cell, group):
+
+    <ROLLUP_ROOT>/by=<group>/res={10,9,8}/h0=<h0>/data_0.parquet
+        cell UBIGINT, grp INT (sorted by both), w12, w12_lo, w12_hi, w34, area_km2, nland
+
+where grp indexes the group names in <ROLLUP_ROOT>/_groups.json and a res-10 cell in
+several groups (border cells) splits its land evenly between them — area_km2 and nland
+(then fractional) alike — so summed over groups every number is the statewide one. Partitions whose inputs are unchanged since the last
+build (see _manifest.json) are skipped; --force rebuilds all."""
+import glob, hashlib, json, os, sys
+from hexengine import BAND_CUTS, DATASETS, GROUPS, ROLLUP, ROOT, WEIGHTS, connect
+
+RES = (10, 9, 8)
+COLUMNS = (*WEIGHTS, "w34")   # a change here rebuilds every partition
+VERSION = 3                   # so does a bump here: change it with the weight SQL (2: NULL-safe cap, 3: grouped nland by share)
+
+def _digest(paths, extra=""):
+    h = hashlib.sha1((f"v{VERSION}:" + ",".join(COLUMNS) + extra).encode())
+    for p in paths:
+        if os.path.exists(p):
+            st = os.stat(p); h.update(f"{p}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()[:16]
+
+def partitions(root=None):
+    """h0 partition names (e.g. 'h0=577199624117288959') of the California land grid."""
+    d = os.path.join(root or ROOT, DATASETS["ecoregion"])
+    return sorted(os.path.basename(os.path.dirname(p)) for p in glob.glob(os.path.join(d, "h0=*", "data_0.parquet")))
+
+def group_names(con, root):
+    """{group: its sorted distinct names} for every mirrored GROUPS layer — what `grp` indexes."""
+    out = {}
+    for g, (ds, col) in GROUPS.items():
+        d = os.path.join(root, DATASETS[ds])
+        if not glob.glob(os.path.join(d, "h0=*", "data_0.parquet")): continue
+        out[g] = [r[0] for r in con.execute(f"SELECT DISTINCT {col}::VARCHAR FROM read_parquet('{d}/h0=*/data_0.parquet') "
+                                            f"WHERE {col} IS NOT NULL ORDER BY 1").fetchall()]
+    return out
+
+def build_partition(con, part, root, out, groups=None):
+    land = os.path.join(root, DATASETS["ecoregion"], part, "data_0.parquet")
+    cons = os.path.join(root, DATASETS["conserved"], part, "data_0.parquet")
+    # COALESCE inside the cap: a cell whose unit rows are all NULL sums to NULL, and LEAST(NULL,1) is 1
+    w = ("SELECT h10, LEAST(COALESCE(SUM((Final_g1_p+Final_g2_p)/100.0),0),1.0) AS w12, "
+         f"LEAST(COALESCE(SUM((Final_g3_p+Final_g4_p)/100.0),0),1.0) AS w34 FROM read_parquet('{cons}') GROUP BY h10"
+         if os.path.exists(cons) else "SELECT NULL::UBIGINT AS h10, 0.0 AS w12, 0.0 AS w34 WHERE false")
+    # the ecoregion grid repeats cells (duplicate rows, border cells in two regions): DISTINCT first
+    bands = ", ".join(f"(COALESCE(c.w12,0) >= {v})::DOUBLE AS {k}" for k, v in BAND_CUTS.items())
+    con.execute(f"""CREATE OR REPLACE TEMP TABLE l10 AS
+        SELECT l.h10::UBIGINT AS h10, l.h9::UBIGINT AS h9, l.h8::UBIGINT AS h8,
+               COALESCE(c.w12,0) AS w12, {bands}, COALESCE(c.w34,0) AS w34, h3_cell_area(l.h10::UBIGINT,'km^2') AS a
+        FROM (SELECT DISTINCT h10, h9, h8 FROM read_parquet('{land}')) l LEFT JOIN ({w}) c USING (h10)""")
+    for res in RES:
+        dest = os.path.join(out, f"res={res}", part)
+        os.makedirs(dest, exist_ok=True)
+        q = (f"SELECT h10 AS cell, {', '.join(COLUMNS)}, a AS area_km2, 1 AS nland FROM l10" if res == 10 else
+             f"SELECT h{res} AS cell, {', '.join(f'SUM({c}*a)/SUM(a) AS {c}' for c in COLUMNS)}, "
+             f"SUM(a) AS area_km2, COUNT(*) AS nland FROM l10 GROUP BY h{res}")
+        con.execute(f"COPY ({q} ORDER BY cell) TO '{dest}/data_0.parquet' (FORMAT parquet)")
+    for g, names in (groups or {}).items():
+        ds, col = GROUPS[g]
+        src = os.path.join(root, DATASETS[ds], part, "data_0.parquet")
+        if not os.path.exists(src): continue
+        con.execute(f"""CREATE OR REPLACE TEMP TABLE g10 AS
+            SELECT h10, grp, 1.0/COUNT(*) OVER (PARTITION BY h10) AS share
+            FROM (SELECT DISTINCT h10::UBIGINT AS h10, {col}::VARCHAR AS name FROM read_parquet('{src}'))
+            JOIN (SELECT unnest(l) AS name, generate_subscripts(l, 1) - 1 AS grp FROM (SELECT ?::VARCHAR[] AS l)) USING (name)""",
+                    [names])
+        for res in RES:
+            dest = os.path.join(out, f"by={g}", f"res={res}", part)
+            os.makedirs(dest, exist_ok=True)
+            q = (f"SELECT l.h{res} AS cell, g.grp, {', '.join(f'SUM({c}*a*share)/SUM(a*share) AS {c}' for c in COLUMNS)}, "
+                 f"SUM(a*share) AS area_km2, SUM(share) AS nland FROM l10 l JOIN g10 g USING (h10) GROUP BY l.h{res}, g.grp")
+            con.execute(f"COPY ({q} ORDER BY cell, grp) TO '{dest}/data_0.parquet' (FORMAT parquet)")
+
+def build(root=None, out=None, force=False):
+    root, out = root or ROOT, out or ROLLUP
+    mpath = os.path.join(out, "_manifest.json")
+    try:
+        with open(mpath) as f: manifest = json.load(f)
+    except (OSError, ValueError): manifest = {}
+    con, built = connect(), 0
+    groups = group_names(con, root)
+    os.makedirs(out, exist_ok=True)
+    with open(os.path.join(out, "_groups.json"), "w") as f: json.dump(groups, f, indent=1)
+    for part in partitions(root):
+        d = _digest([os.path.join(root, DATASETS[k], part, "data_0.parquet")
+                     for k in ("ecoregion", "conserved", *(GROUPS[g][0] for g in groups))], json.dumps(groups))
+        done = all(os.path.exists(os.path.join(out, *by, f"res={r}", part, "data_0.parquet"))
+                   for r in RES for by in [[]] + [[f"by={g}"] for g in groups])
+        if not force and done and manifest.get(part) == d: continue
+        build_partition(con, part, root, out, groups)
+        manifest[part] = d; built += 1
+        with open(mpath, "w") as f: json.dump(manifest, f, indent=1, sort_keys=True)
+    print(f"rollup: {built} partition(s) built, {len(manifest) - built} unchanged -> {out}")
+    return out
+
+if __name__ == "__main__":
+    build(force="--force" in sys.argv)
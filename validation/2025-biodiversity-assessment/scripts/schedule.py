@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Fan the kernel overlays out as (family × h0 partition) tasks on a process pool.
+
+Every task is independent — one feature family joined to one rollup partition — and
+returns partial num/den arrays that simply add, so the reduce is a sum. Each finished
+task is checkpointed to local scratch as `<SCRATCH>/<key>/<family>__<h0>.npz` (written
+to a temp name and renamed, so a half-written file never counts); `key` is the input
+version, so a rerun after a reaped pod (see slr-mask-sweep/README.md) only computes the
+tasks that had not finished, and changed inputs never reuse stale partials.
+
+    python scripts/schedule.py [--workers N] [--fresh]
+
+runs the whole reproduction this way and prints the computed values."""
+import os, shutil, sys, tempfile, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from hexengine import WEIGHTS
+from hexjoin import as_dict, overlay_partition, partitions
+
+SCRATCH = os.environ.get("SCRATCH", os.path.join(tempfile.gettempdir(), "ca30x30-overlay"))
+
+def _task(fam, part, rollup, path, ngroups=None):
+    num, den = overlay_partition(fam, part, rollup, ngroups)
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, num=num, den=den)
+    os.replace(tmp, path)
+    return fam.name, part, num, den
+
+def run(fams, rollup, workers=None, scratch=None, key="default", names=None):
+    """{family name: {label: [num, den]}} over every (family, partition) task; with group
+    `names` (rollup = a by=<group> tree), {label: {region: [num, den]}}."""
+    d = os.path.join(scratch or SCRATCH, key)
+    os.makedirs(d, exist_ok=True)
+    G = len(names) if names is not None else None
+    tot = {f.name: [np.zeros((len(WEIGHTS), len(f.labels) * (G or 1))), np.zeros(len(f.labels) * (G or 1))]
+           for f in fams}
+    todo, resumed = [], 0
+    for f in fams:
+        for part in partitions(f.path):
+            path = os.path.join(d, f"{f.name}__{part}.npz")
+            try:
+                with np.load(path) as z: num, den = z["num"], z["den"]
+            except (OSError, ValueError, KeyError):
+                todo.append((f, part, rollup, path, G)); continue
+            tot[f.name][0] += num; tot[f.name][1] += den; resumed += 1
+    t0 = time.time()
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            for fut in as_completed([pool.submit(_task, *t) for t in todo]):
+                name, _, num, den = fut.result()
+                tot[name][0] += num; tot[name][1] += den
+    print(f"schedule: {len(todo)} task(s) run, {resumed} resumed from {d} "
+          f"({time.time() - t0:.1f}s, {workers or os.cpu_count()} workers)", file=sys.stderr)
+    return {f.name: as_dict(f, *tot[f.name], names) for f in fams}
+
+if __name__ == "__main__":
+    import json
+    from hexengine import reproduce
+    from hexjoin import KernelEngine
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else os.cpu_count()
+    if "--fresh" in sys.argv: shutil.rmtree(SCRATCH, ignore_errors=True)
+    print(json.dumps(reproduce(KernelEngine(workers=workers)), indent=1))
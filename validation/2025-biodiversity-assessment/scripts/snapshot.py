@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Columnar snapshot of the extraction and reproduction records, for random access.
+
+One row per record entry — extraction statistics, reproductions, and with
+`build_reproduction_record.py --compute --by` every regional (family, key, region)
+cell — in a single Arrow IPC file next to the JSON:
+
+    records.arrow   typed columns; group / label / metric / match / region strings
+                    dictionary-encoded; rows sorted by (vintage, group, feature_key), and
+                    the schema metadata holds the index {vintage: {group: {feature_key:
+                    [first row, end row]}}} plus each source record's sha1
+
+Opened memory-mapped, so a lookup reads the footer and the rows it slices, never the
+whole document. Several assessment vintages go in one file: pass each assessment
+directory (its vintage is the year its name starts with, or DIR=VINTAGE).
+
+    python scripts/snapshot.py                                 # this assessment
+    python scripts/snapshot.py . ../2022-biodiversity-assessment
+    python scripts/snapshot.py --find "Acreage increase"       # feature_key / id / label words
+    python scripts/snapshot.py --compare acreage_increase_since_2022 2022 2025
+
+feature_key is the entry's own (every statistic has a semantic one, stable across
+vintages, so --compare lines up the same statistic), else its id. A reproduction is filed
+under the statistic with its feature_key — the one in its own group when the key recurs —
+and gets that statistic's group and id (stat_id), so one get() returns the reported value
+and its reproduction together; with no such statistic it keeps its own group. Paths
+default to the assessment directory, wherever this runs from."""
+import hashlib, json, os, re, sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ASSESSMENT = os.path.normpath(os.path.join(HERE, ".."))
+OUT = os.path.join(ASSESSMENT, "records.arrow")
+RECORDS = {"extraction": ("extraction_record.json", "statistics"),
+           "reproduction": ("reproduction_record.json", "reproductions")}
+# (column, type); "dict" = dictionary-encoded string
+COLUMNS = [("vintage", "dict"), ("group", "dict"), ("feature_key", "str"), ("record", "dict"), ("id", "str"),
+           ("stat_id", "str"), ("record_group", "dict"),
+           ("label", "dict"), ("metric", "dict"), ("by", "dict"), ("region", "dict"), ("value", "f64"),
+           ("reported", "f64"), ("lower80", "f64"), ("upper20", "f64"), ("band_note", "str"),
+           ("reproduced_lower80", "f64"), ("reproduced_upper20", "f64"), ("abs_diff", "f64"),
+           ("match", "dict"), ("in_band", "dict"), ("gap34_pct", "f64"), ("nonconserved_pct", "f64"),
+           ("extent_km2", "f64"), ("dataset", "dict"), ("note", "str"), ("source", "str")]
+
+def vintage_of(d):
+    m = re.match(r"(\d{4})", os.path.basename(os.path.abspath(d)))
+    if not m: raise ValueError(f"no vintage year in '{d}': pass it as DIR=VINTAGE")
+    return m.group(1)
+
+def _pair(b):
+    return b if isinstance(b, list) and len(b) == 2 else [None, None]
+
+def statistic(r, stats):
+    """The extraction statistic a reproduction entry reproduces (same feature_key), or None."""
+    c = [e for e in stats if r.get("feature_key") and e.get("feature_key") == r["feature_key"]]
+    if len(c) > 1: c = [e for e in c if e["group"] == r["group"]]
+    return c[0] if len(c) == 1 else None
+
+def rows(d, vintage):
+    """(snapshot rows, {record file: sha1}) of one assessment directory."""
+    out, digests, stats = [], {}, []
+    for kind, (name, key) in RECORDS.items():
+        path = os.path.join(d, name)
+        if not os.path.exists(path): continue
+        with open(path, "rb") as f: raw = f.read()
+        digests[f"{vintage}/{name}"] = hashlib.sha1(raw).hexdigest()[:16]
+        rec = json.loads(raw)
+        if kind == "extraction": stats = rec[key]
+        for e in rec[key]:
+            s = e if kind == "extraction" else statistic(e, stats)
+            r = {"vintage": vintage, "group": (s or e)["group"], "feature_key": (s or e).get("feature_key") or (s or e)["id"],
+                 "record": kind, "id": e["id"], "stat_id": s and s["id"], "record_group": e["group"], "label": e["label"],
+                 "dataset": e.get("dataset"), "note": e.get("note"), "source": e.get("source")}
+            if kind == "extraction":
+                unc = e.get("uncertainty")
+                r.update(metric=e["metric"], value=e.get("reported_value"), reported=e.get("reported_value"),
+                         gap34_pct=e.get("gap34_pct"), nonconserved_pct=e.get("nonconserved_pct"),
+                         band_note=unc if isinstance(unc, str) else None)
+                r["lower80"], r["upper20"] = _pair(unc)
+            else:
+                r.update(value=e.get("reproduced"), reported=e.get("reported_Disc"), abs_diff=e.get("abs_diff"),
+                         match=e.get("match"), in_band=e.get("in_band"))
+                r["lower80"], r["upper20"] = _pair(e.get("reported_band"))
+                r["reproduced_lower80"], r["reproduced_upper20"] = _pair(e.get("reproduced_band"))
+            out.append(r)
+        for by, t in (rec.get("regional") or {}).items():
+            for v in t["rows"]:
+                c = dict(zip(t["columns"], v))
+                out.append({"vintage": vintage, "group": c["family"], "record_group": c["family"],
+                            "feature_key": str(c["key"]), "record": "regional",
+                            "id": f"{by}:{c['family']}:{c['key']}:{c['region']}", "label": str(c["key"]), "by": by,
+                            "region": c["region"], "value": c["pct"], "reproduced_lower80": c["lower80"],
+                            "reproduced_upper20": c["upper20"], "extent_km2": c["extent_km2"]})
+    return out, digests
+
+def build(dirs=(ASSESSMENT,), out=OUT):
+    import pyarrow as pa
+    table, digests = [], {}
+    for d in dirs:
+        d, _, v = d.partition("=")
+        r, h = rows(d, v or vintage_of(d))
+        table += r; digests.update(h)
+    if not table: raise FileNotFoundError(f"no {' / '.join(n for n, _ in RECORDS.values())} in {', '.join(dirs)}")
+    table.sort(key=lambda r: (r["vintage"], r["group"], r["feature_key"], r["record"], r.get("region") or "", r["id"]))
+    index = {}
+    for i, r in enumerate(table):
+        span = index.setdefault(r["vintage"], {}).setdefault(r["group"], {}).setdefault(r["feature_key"], [i, i])
+        span[1] = i + 1
+    types = {"dict": pa.dictionary(pa.int32(), pa.string()), "str": pa.string(), "f64": pa.float64()}
+    schema = pa.schema([(c, types[t]) for c, t in COLUMNS],
+                       metadata={"index": json.dumps(index, separators=(",", ":")), "sources": json.dumps(digests)})
+    cols = {c: [r.get(c) for r in table] for c, _ in COLUMNS}
+    t = pa.table({c: (pa.array(cols[c], pa.string()).dictionary_encode() if k == "dict" else pa.array(cols[c], types[k]))
+                  for c, k in COLUMNS}, schema=schema)
+    tmp = out + ".tmp"
+    with pa.OSFile(tmp, "wb") as f, pa.ipc.new_file(f, schema) as w:
+        w.write_table(t)
+    os.replace(tmp, out)
+    print(f"{out}: {len(table)} rows, {sum(len(g) for v in index.values() for g in v.values())} "
+          f"(vintage, group, feature_key) keys, vintages {', '.join(sorted(index))}")
+    return out
+
+class Snapshot:
+    """records.arrow, memory-mapped; every lookup is an index hit plus a zero-copy slice."""
+    def __init__(self, path=OUT):
+        import pyarrow as pa
+        self.table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        meta = self.table.schema.metadata
+        self.index, self.sources = json.loads(meta[b"index"]), json.loads(meta[b"sources"])
+
+    def get(self, vintage, group, feature_key, record=None):
+        """Rows for one (vintage, group, feature_key), as dicts; optionally one record kind."""
+        span = self.index.get(str(vintage), {}).get(group, {}).get(feature_key)
+        if not span: return []
+        out = self.table.slice(span[0], span[1] - span[0]).to_pylist()
+        return [r for r in out if record is None or r["record"] == record]
+
+    def find(self, feature_key, vintage=None, record=None):
+        """Rows for `feature_key` in every group (and vintage, unless given)."""
+        return [r for v, groups in self.index.items() if vintage in (None, v)
+                for g, keys in groups.items() if feature_key in keys
+                for r in self.get(v, g, feature_key, record)]
+
+    def compare(self, feature_key, a, b, record="extraction"):
+        """{(group, region): [value in vintage a, value in b, b - a]} for one statistic."""
+        vals = {}
+        for i, v in enumerate((str(a), str(b))):
+            for r in self.find(feature_key, v, record):
+                vals.setdefault((r["group"], r["region"]), [None, None])[i] = r["value"]
+        return {k: [x, y, None if None in (x, y) else round(y - x, 6)] for k, (x, y) in vals.items()}
+
+def search(snap, q):
+    """find() on a feature_key / id, else rows whose label contains every word of q."""
+    hits = snap.find(q)
+    if hits: return hits
+    ids = snap.table.column("id").to_pylist()
+    if q in ids:
+        i = ids.index(q); return snap.table.slice(i, 1).to_pylist()
+    labels = [str(x).lower() for x in snap.table.column("label").to_pylist()]
+    words = q.lower().split()
+    return [snap.table.slice(i, 1).to_pylist()[0] for i, l in enumerate(labels) if words and all(w in l for w in words)]
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--find"]:
+        for r in search(Snapshot(), " ".join(args[1:])):
+            band = f" [{r['lower80']}, {r['upper20']}]" if r["lower80"] is not None else ""
+            where = f" {r['by']}={r['region']}" if r["region"] else ""
+            print(f"{r['vintage']} {r['record']:<12} {r['id']:<16} {r['group'][:40]:<40}{where} {r['value']}{band}  {r['label']}")
+    elif args[:1] == ["--compare"]:
+        key, a, b = args[1:4]
+        for (g, region), (x, y, d) in sorted(Snapshot().compare(key, a, b).items(), key=str):
+            print(f"{g}{' / ' + region if region else ''}: {a} {x}  {b} {y}  Δ {d}")
+    else:
+        build(args or (ASSESSMENT,))
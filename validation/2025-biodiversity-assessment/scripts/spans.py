@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Per-turn profiling spans for headless runs, and their flame-style roll-ups.
+
+headless.py records a Trace per cell: one `llm` span per chat call (latency, TTFT,
+prompt / cached / completion tokens, cost, and `context_growth` — how many more prompt
+tokens this turn resent than the last) and one `tool` span per MCP call (tool, SQL text,
+result rows and bytes, plus `rows_scanned` / `bytes_read` when the server reports them).
+The spans ride along in the cell's JSONL line under "spans".
+
+    python scripts/spans.py runs/glm-5.2.jsonl            # per-question breakdown
+    python scripts/spans.py runs/glm-5.2.jsonl --folded   # folded stacks (flamegraph.pl, speedscope)
+
+Profile.tap() collects the same per-cell numbers while build_scorecard.py streams the
+cells, for the latency / cost table next to accuracy."""
+import argparse, json, re, statistics, sys, time
+from collections import defaultdict
+
+class Trace:
+    """Spans of one cell, timed relative to its start."""
+    def __init__(self):
+        self.t0, self.spans, self.last_prompt = time.monotonic(), [], None
+
+    def span(self, kind, name, **attrs):
+        return _Span(self, kind, name, attrs)
+
+    def llm(self, turn, usage, ttft, messages):
+        """Usage attributes of an llm span, with the context growth since the previous turn."""
+        prompt = usage.get("prompt_tokens") or 0
+        growth = prompt - self.last_prompt if self.last_prompt is not None else prompt
+        self.last_prompt = prompt
+        return {"turn": turn, "messages": messages, "prompt_tokens": prompt,
+                "cached_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0,
+                "completion_tokens": usage.get("completion_tokens") or 0,
+                "reasoning_tokens": (usage.get("completion_tokens_details") or {}).get("reasoning_tokens") or 0,
+                "context_growth": growth, "cost": usage.get("cost"),
+                "ttft_s": None if ttft is None else round(ttft, 3)}
+
+class _Span:
+    def __init__(self, trace, kind, name, attrs):
+        self.trace, self.rec = trace, {"kind": kind, "name": name, **attrs}
+    def __enter__(self):
+        self.start = time.monotonic()
+        self.rec["start_s"] = round(self.start - self.trace.t0, 3)
+        return self.rec
+    def __exit__(self, et, e, tb):
+        self.rec["dur_s"] = round(time.monotonic() - self.start, 3)
+        if e is not None: self.rec["error"] = f"{et.__name__}: {e}"
+        self.trace.spans.append(self.rec)
+
+_ROW = re.compile(r"^\|(?!\s*-)", re.M)
+
+def tool_stats(result, text):
+    """Result size of an MCP tools/call, and the server's scan stats when it reports them."""
+    out = {"result_bytes": len(text.encode()), "result_rows": max(len(_ROW.findall(text)) - 1, 0)}
+    meta = {**(result.get("_meta") or {}), **(result.get("structuredContent") or {})}
+    for k in ("rows_scanned", "bytes_read", "rows", "elapsed_s"):
+        if isinstance(meta.get(k), (int, float)): out[k] = meta[k]
+    return out
+
+# ---- roll-ups --------------------------------------------------------------------
+def _reported(spans, k):
+    """Sum of `k` over the spans that carry it; None when the server never reported it (not 0)."""
+    v = [s[k] for s in spans if k in s]
+    return sum(v) if v else None
+
+def cell_summary(c):
+    """Where one cell's wall time and tokens went."""
+    sp = c.get("spans") or []
+    llm = [s for s in sp if s["kind"] == "llm"]
+    tool = [s for s in sp if s["kind"] == "tool"]
+    total = c.get("latency_s") or 0.0
+    llm_s, tool_s = sum(s["dur_s"] for s in llm), sum(s["dur_s"] for s in tool)
+    prompts = [s["prompt_tokens"] for s in llm]
+    return {"qid": c.get("qid"), "trial": c.get("trial"), "latency_s": total, "llm_s": llm_s, "tool_s": tool_s,
+            "other_s": max(total - llm_s - tool_s, 0.0), "turns": len(llm), "tool_calls": len(tool),
+            "context_first": prompts[0] if prompts else None, "context_last": prompts[-1] if prompts else None,
+            "input_tokens": c.get("input_tokens"), "cached_tokens": c.get("cached_tokens"),
+            "output_tokens": c.get("output_tokens"), "cost": c.get("cost"),
+            "rows_scanned": _reported(tool, "rows_scanned"), "bytes_read": _reported(tool, "bytes_read")}
+
+def folded(cells):
+    """Folded stacks `qid;turn N;llm|tool:<name> <ms>` summed over trials (flamegraph.pl input)."""
+    acc = defaultdict(float)
+    for c in cells:
+        turn = 0
+        for s in c.get("spans") or []:
+            if s["kind"] == "llm": turn = s.get("turn", turn)
+            frame = "llm" if s["kind"] == "llm" else f"tool:{s['name']}"
+            acc[f"{c.get('qid')};turn {turn};{frame}"] += s["dur_s"] * 1000
+        s = cell_summary(c)
+        if s["other_s"]: acc[f"{c.get('qid')};overhead"] += s["other_s"] * 1000
+    return [f"{k} {round(v)}" for k, v in sorted(acc.items())]
+
+def by_question(cells):
+    """{qid: mean over trials of each cell_summary field}."""
+    groups = defaultdict(list)
+    for c in cells: groups[c.get("qid")].append(cell_summary(c))
+    out = {}
+    for q, rows in sorted(groups.items(), key=lambda kv: str(kv[0])):
+        out[q] = {k: statistics.fmean(v) if (v := [r[k] for r in rows if isinstance(r[k], (int, float))]) else None
+                  for k in rows[0] if k not in ("qid", "trial")}
+    return out
+
+def pctl(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p * len(xs)))] if xs else None
+
+class Profile:
+    """Per-model cell summaries gathered while another consumer streams the cells."""
+    def __init__(self): self.cells = defaultdict(list)
+
+    def tap(self, model, cells):
+        for c in cells:
+            if c.get("latency_s") is not None: self.cells[model].append(cell_summary(c))
+            yield c
+
+    def table(self):
+        """Markdown latency / cost breakdown, one row per model that has telemetry."""
+        if not self.cells: return []
+        o = ["| model | cells | median latency | p90 | LLM / tool / other | turns | context growth / turn | input tok (cached) | output tok | cost |",
+             "|--|--:|--:|--:|--:|--:|--:|--:|--:|--:|"]
+        for m, rows in self.cells.items():
+            lat = [r["latency_s"] for r in rows]
+            tot = sum(lat) or 1.0
+            share = "/".join(f"{100 * sum(r[k] for r in rows) / tot:.0f}%" for k in ("llm_s", "tool_s", "other_s"))
+            turns = sum(r["turns"] for r in rows)
+            grow = [(r["context_last"] - r["context_first"]) / (r["turns"] - 1) for r in rows
+                    if r["turns"] > 1 and r["context_first"] is not None]
+            inp, cached = sum(r["input_tokens"] or 0 for r in rows), sum(r["cached_tokens"] or 0 for r in rows)
+            cost = [r["cost"] for r in rows if r["cost"] is not None]
+            o.append(f"| {m} | {len(rows)} | {statistics.median(lat):.1f} s | {pctl(lat, 0.9):.1f} s | {share} | "
+                     f"{turns / len(rows):.1f} | {statistics.fmean(grow) if grow else 0:,.0f} tok | "
+                     f"{inp:,} ({100 * cached / inp if inp else 0:.0f}%) | {sum(r['output_tokens'] or 0 for r in rows):,} | "
+                     + (f"${sum(cost):.2f}" if cost else "—") + " |")
+        return o
+
+def main(argv=None):
+    from transcripts import cells
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("run")
+    ap.add_argument("--folded", action="store_true")
+    a = ap.parse_args(argv)
+    cs = list(cells(a.run))
+    if a.folded:
+        print("\n".join(folded(cs))); return
+    print("qid\tlatency_s\tllm_s\ttool_s\tother_s\tturns\ttool_calls\tcontext_first\tcontext_last\tcost")
+    for q, s in by_question(cs).items():
+        f = lambda v: "" if v is None else (f"{v:.2f}" if isinstance(v, float) else str(v))
+        print("\t".join([str(q)] + [f(s[k]) for k in ("latency_s", "llm_s", "tool_s", "other_s", "turns",
+                                                      "tool_calls", "context_first", "context_last", "cost")]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Shared loader for the report's featureGAPSummary_<name>.csv result tables.
+
+Each CSV is parsed once into a typed, key-indexed Table (float columns for the
+estimate/band/GAP-share fields, strings for everything else) and cached on disk
+as a pickle keyed by the CSV's mtime + sha1, so repeat lookups and repeat runs
+against the same Result_CSVs_* drop never re-parse it."""
+import csv, hashlib, math, os, pickle
+from array import array
+
+CSVDIR = os.environ.get("RESULT_CSVS", "csvs/Result_CSVs_2025data")
+FLOAT_COLS = ("Disc", "Lower80", "Upper20", "g34", "nonconserved")
+CACHE_VERSION = 1
+
+def _float(x):
+    try: return float(x)
+    except (TypeError, ValueError): return math.nan
+
+class Table:
+    """One summary CSV: `keys` in file order, `index` key -> row number,
+    `cols` float column -> array('d') (NaN = missing), `text` other columns -> list[str].
+    Reads like the old dict-of-rows: t[key], t.get(key), t.items(), key in t."""
+    def __init__(self, keys, cols, text):
+        self.keys, self.cols, self.text = keys, cols, text
+        self.index = {k: i for i, k in enumerate(keys)}
+
+    def value(self, key, col="Disc"):
+        """Float cell for (key, col), or None if the key or value is missing."""
+        i = self.index.get(key)
+        if i is None: return None
+        v = self.cols[col][i]
+        return None if math.isnan(v) else v
+
+    def row(self, i):
+        out = {c: v[i] for c, v in self.text.items()}
+        for c, v in self.cols.items():
+            out[c] = None if math.isnan(v[i]) else v[i]
+        return out
+
+    def __getitem__(self, key): return self.row(self.index[key])
+    def __contains__(self, key): return key in self.index
+    def __iter__(self): return iter(self.keys)
+    def __len__(self): return len(self.keys)
+    def get(self, key, default=None):
+        i = self.index.get(key)
+        return default if i is None else self.row(i)
+    def items(self):
+        for i, k in enumerate(self.keys): yield k, self.row(i)
+
+def parse(path):
+    """Single pass over a summary CSV -> Table. First column is the feature key."""
+    with open(path, newline="") as f:
+        r = csv.reader(f)
+        header = next(r)
+        fcols = [(j, c) for j, c in enumerate(header) if c in FLOAT_COLS]
+        tcols = [(j, c) for j, c in enumerate(header) if j and c not in FLOAT_COLS]
+        keys, cols = [], {c: array("d") for _, c in fcols}
+        text = {c: [] for _, c in tcols}
+        for row in r:
+            if not row: continue
+            row += [""] * (len(header) - len(row))
+            keys.append(row[0])
+            for j, c in fcols: cols[c].append(_float(row[j]))
+            for j, c in tcols: text[c].append(row[j])
+    return Table(keys, cols, text)
+
+def _sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""): h.update(chunk)
+    return h.hexdigest()
+
+_tables = {}
+def load(name, csvdir=None):
+    """Table for featureGAPSummary_<name>.csv — memoized in-process and on disk."""
+    csvdir = csvdir or CSVDIR
+    path = os.path.join(csvdir, f"featureGAPSummary_{name}.csv")
+    if path in _tables: return _tables[path]
+    cache = os.path.join(csvdir, ".cache", f"{name}.pickle")
+    mtime = os.stat(path).st_mtime_ns
+    hit = None
+    try:
+        with open(cache, "rb") as f: hit = pickle.load(f)
+        if hit.get("version") != CACHE_VERSION: hit = None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        hit = None
+    digest = None
+    if hit and hit["mtime"] != mtime:
+        # touched but maybe not changed (re-unzipped drop): fall back to the content hash
+        digest = _sha1(path)
+        if hit["sha1"] != digest: hit = None
+    if hit:
+        t = hit["table"]
+        if hit["mtime"] != mtime: _write(cache, mtime, digest, t)
+    else:
+        t = parse(path)
+        _write(cache, mtime, digest or _sha1(path), t)
+    _tables[path] = t
+    return t
+
+def _write(cache, mtime, digest, t):
+    try:
+        os.makedirs(os.path.dirname(cache), exist_ok=True)
+        tmp = cache + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({"version": CACHE_VERSION, "mtime": mtime, "sha1": digest, "table": t}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache)
+    except OSError:
+        pass  # read-only drop: the in-process memo still gives one parse per run
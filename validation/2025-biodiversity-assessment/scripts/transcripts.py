@@ -0,0 +1,130 @@
+"""Streaming reader for the headless-run transcript logs (`*_full.log`, optionally .gz)
+and headless.py's JSONL run files.
+
+A log is free text in which every cell is a `----- q<N>__<...>.json -----` marker
+followed by that cell's JSON object. cells() yields the decoded objects one at a time
+from fixed-size chunks, so memory is bounded by the largest single cell, not the log.
+
+Next to each log a `<log>.idx.json` keeps the byte offset and length of every cell
+found so far and the offset the scan stopped at. A later run re-reads the indexed
+cells directly and only scans the bytes appended since (a new trial), after checking
+that the indexed prefix is unchanged; a rewritten log is rescanned from the start.
+Offsets of a .gz log are into the decompressed stream (reaching them still inflates
+the prefix, but nothing before the tail is regex-scanned or JSON-parsed twice)."""
+import gzip, hashlib, json, os, re
+
+MARK = re.compile(rb"-----\s+q\d+__[^\n]+\.json\s+-----\n")
+CHUNK = 1 << 20
+MAX_CELL = 64 << 20    # a "cell" still undecodable after this many bytes is treated as garbage
+KEEP = 4096            # unmatched tail kept across chunks: longer than any marker
+INDEX_VERSION = 1
+
+def resolve(path):
+    """`path`, or `path.gz` when only the compressed log is present."""
+    return path if os.path.exists(path) or not os.path.exists(path + ".gz") else path + ".gz"
+
+def _open(path):
+    f = open(path, "rb")
+    if f.read(2) == b"\x1f\x8b":
+        f.close(); return gzip.open(path, "rb")
+    f.seek(0); return f
+
+def scan(f, start=0):
+    """Yield (offset, length, cell) from byte `start` of the open log; then return (via
+    StopIteration.value) the offset a later scan should resume from. A cell is the bytes
+    between its marker and the next, decoded once; one that does not parse is skipped,
+    unless it is cut off at EOF (a trial still being written) — that is left for the
+    later scan."""
+    dec = json.JSONDecoder()
+    buf, base, pos, eof = b"", start, 0, False
+    def more():
+        nonlocal buf, eof
+        chunk = f.read(CHUNK)
+        if chunk: buf += chunk
+        else: eof = True
+    more()
+    while True:
+        m = MARK.search(buf, pos)
+        if not m:
+            if eof: return base + max(pos, len(buf) - KEEP)   # a marker may be half-written
+            cut = max(pos, len(buf) - KEEP)
+            buf, base, pos = buf[cut:], base + cut, 0
+            more(); continue
+        # drop what is behind the marker so the buffer stays one cell wide
+        buf, base = buf[m.start():], base + m.start()
+        body = m.end() - m.start()
+        # the cell ends at the next marker; only the newly read bytes are searched for it
+        n = MARK.search(buf, body)
+        while not n and not eof and len(buf) - body < MAX_CELL:
+            look = max(body, len(buf) - KEEP)
+            more(); n = MARK.search(buf, look)
+        end = n.start() if n else len(buf)
+        # like the old whole-file scan: the object starts at the first '{' after the marker
+        s = buf.find(b"{", body, end)
+        ok = False
+        if s >= 0:
+            text = buf[s:end].decode("utf-8", "replace")
+            try:
+                cell, e = dec.raw_decode(text)
+                ok = True
+            except ValueError:
+                pass
+        if ok:
+            n_bytes = len(text[:e].encode())
+            yield base + s, n_bytes, cell
+            pos = s + n_bytes
+        elif eof and not n:
+            return base   # last cell incomplete: resume at its marker next time
+        else:
+            pos = end     # malformed (or past MAX_CELL): skip to the next marker
+
+def _fingerprint(f, end):
+    """sha1 of the first and last KEEP bytes before `end` — cheap check the prefix is unchanged."""
+    h = hashlib.sha1()
+    f.seek(0); h.update(f.read(min(KEEP, end)))
+    f.seek(max(0, end - KEEP)); h.update(f.read(min(KEEP, end)))
+    return h.hexdigest()
+
+def index_path(path): return path + ".idx.json"
+
+def records(path):
+    """Cells of a headless.py JSONL run file (plain or .gz), one line at a time."""
+    with _open(path) as f:
+        for line in f:
+            if line.strip(): yield json.loads(line)
+
+def cells(path, index=True):
+    """Decoded cells of a transcript log or headless.py .jsonl run, in file order."""
+    path = resolve(path)
+    if path.endswith((".jsonl", ".jsonl.gz")):
+        yield from records(path); return
+    idx = None
+    if index:
+        try:
+            with open(index_path(path)) as fh: idx = json.load(fh)
+            if idx.get("version") != INDEX_VERSION: idx = None
+        except (OSError, ValueError): idx = None
+    with _open(path) as f:
+        if idx:
+            try: same = _fingerprint(f, idx["end"]) == idx["fingerprint"]
+            except (OSError, EOFError): same = False
+            if not same: idx = None
+        spans = idx["cells"] if idx else []
+        for off, n in spans:
+            f.seek(off)
+            yield json.loads(f.read(n).decode("utf-8", "replace"))
+        start = idx["end"] if idx else 0
+        f.seek(start)
+        new, it = [], scan(f, start)
+        while True:
+            try: off, n, cell = next(it)
+            except StopIteration as stop: end = stop.value; break
+            new.append([off, n]); yield cell
+        if index and (new or not idx or end != idx["end"]):
+            doc = {"version": INDEX_VERSION, "end": end, "fingerprint": _fingerprint(f, end), "cells": spans + new}
+            try:
+                tmp = index_path(path) + ".tmp"
+                with open(tmp, "w") as fh: json.dump(doc, fh)
+                os.replace(tmp, index_path(path))
+            except OSError:
+                pass   # read-only log dir: still correct, just no head start next time
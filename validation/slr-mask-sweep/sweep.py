@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Sea-level-rise mask sweep as a cached, parallel Python pipeline — ca-30x30#104
+
+Two stages, so a new mask hypothesis never touches geometry again:
+
+  measure   one worker per region: fetch the NOAA zip, read every *_slr_* / *_low_* layer,
+            reproject to EPSG:3310, make valid, and record its area (and, with --mask, its
+            area inside the CA ecoregion mask — what clip.R measured). Each region's result
+            is a small Parquet in SLR_CACHE keyed by the zip's sha1 (+ the mask's), so a
+            rerun against unchanged sources reads the cache and does no geometry at all.
+
+  combo     evaluates mask expressions such as  conn5-conn0+low5  on the cached per-level
+            areas. NOAA's connected levels are strictly nested and low-lying is disjoint
+            from connected, so every level difference or union is plain arithmetic:
+                area((conn5 - conn0) ∩ CA) == area(conn5 ∩ CA) - area(conn0 ∩ CA)
+            The published sweep-results.tsv / clip-results.tsv can stand in for the cache
+            (--tsv), so this stage needs neither the zips nor a GIS stack.
+
+    python sweep.py measure [--regions Delta SFBay] [--workers 7] [--mask ca-ecoregion-mask.geojson]
+    python sweep.py combo conn5-conn0 conn5-conn0+low5 [--clip] [--tsv sweep-results.tsv clip-results.tsv]
+
+SLR_BASE may be a local directory (or file:// URL) of CA_<region>_slr_data_dist.zip
+fixtures in place of coast.noaa.gov. measure emits the same tab-separated RESULT lines
+as sweep.R. The geometry stage needs geopandas + pyogrio; combo needs only pyarrow."""
+import argparse, glob, hashlib, os, re, shutil, sys, tempfile, urllib.request, zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+BASE    = os.environ.get("SLR_BASE", "https://coast.noaa.gov/slrdata/Sea_Level_Rise_Vectors/CA")
+REGIONS = ("Catalina", "Central", "Delta", "North1", "North2", "SFBay", "South")
+ACRE_M2 = 4046.8564224
+EPSG    = 3310
+SCRATCH = os.environ.get("SCRATCH", "/scratch" if os.path.isdir("/scratch") else tempfile.gettempdir())
+CACHE   = os.environ.get("SLR_CACHE", os.path.join(SCRATCH, "slr-cache"))
+TARGET  = 642610
+LAYER   = re.compile(r"_(slr|low)_([0-9]+)(?:_([0-9]+))?ft")
+SCHEMA  = pa.schema([("region", pa.string()), ("layer", pa.string()), ("kind", pa.string()),
+                     ("level_ft", pa.float64()), ("acres", pa.float64()), ("acres_clip", pa.float64())])
+
+def log(*a): print(*a, file=sys.stderr, flush=True)
+
+def sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""): h.update(chunk)
+    return h.hexdigest()[:16]
+
+def parse_layer(name):
+    """(kind, level_ft) for a NOAA layer name, or None. Older vintages use *_slr_<N>ft."""
+    m = LAYER.search(name)
+    if not m: return None
+    return ("connected" if m[1] == "slr" else "lowlying"), int(m[2]) + (int(m[3]) / 10 if m[3] else 0.0)
+
+# ---- sources ------------------------------------------------------------------
+def fetch(region):
+    """Local path of the region's zip: the fixture itself for a local SLR_BASE, else a
+    download into SCRATCH (kept, so a resumed run on the same pod skips it)."""
+    fname = f"CA_{region}_slr_data_dist.zip"
+    base = BASE[7:] if BASE.startswith("file://") else BASE
+    if "://" not in base:
+        return os.path.join(base, fname)
+    dest = os.path.join(SCRATCH, fname)
+    if not os.path.exists(dest):
+        tmp = dest + ".part"
+        with urllib.request.urlopen(f"{base}/{fname}") as r, open(tmp, "wb") as f: shutil.copyfileobj(r, f)
+        os.replace(tmp, dest)
+    return dest
+
+def ogr_source(exdir):
+    """Newer vintages ship a GeoPackage, older ones an Esri File GDB."""
+    src = sorted(glob.glob(os.path.join(exdir, "**", "*.gpkg"), recursive=True))
+    src = src or sorted(d for d, _, _ in os.walk(exdir) if d.endswith(".gdb"))
+    return src[0] if src else None
+
+# ---- measure (geometry, once per source) --------------------------------------
+def load_mask(path):
+    import geopandas as gpd
+    return gpd.read_file(path).to_crs(EPSG).make_valid().union_all()
+
+def measure_region(region, mask_path=None):
+    """Per-layer areas for one region, from the cache when the zip (and mask) are unchanged."""
+    src = fetch(region)
+    key = sha1(src) + (f"-{sha1(mask_path)}" if mask_path else "")
+    path = os.path.join(CACHE, f"{region}-{key}.parquet")
+    if os.path.exists(path): return region, pq.read_table(path).to_pylist(), True
+    import geopandas as gpd, pyogrio
+    mask = load_mask(mask_path) if mask_path else None
+    exdir = tempfile.mkdtemp(prefix=f"slr-{region}-", dir=SCRATCH)
+    try:
+        with zipfile.ZipFile(src) as z: z.extractall(exdir)
+        ogr = ogr_source(exdir)
+        if not ogr: raise RuntimeError(f"{region}: no OGR source in {os.path.basename(src)}")
+        rows = []
+        for ln in pyogrio.list_layers(ogr)[:, 0]:
+            p = parse_layer(ln)
+            if not p: continue
+            g = gpd.read_file(ogr, layer=ln, engine="pyogrio").to_crs(EPSG).make_valid()
+            clip = g.intersection(mask).area.sum() / ACRE_M2 if mask is not None else None
+            rows.append({"region": region, "layer": ln, "kind": p[0], "level_ft": p[1],
+                         "acres": g.area.sum() / ACRE_M2, "acres_clip": clip})
+    finally:
+        shutil.rmtree(exdir, ignore_errors=True)
+    os.makedirs(CACHE, exist_ok=True)
+    tmp = path + ".tmp"
+    pq.write_table(pa.Table.from_pylist(rows, schema=SCHEMA), tmp)
+    os.replace(tmp, path)
+    return region, rows, False
+
+def measure(regions=REGIONS, workers=None, mask=None):
+    """All regions' layer areas, one region per worker process; printed as RESULT lines."""
+    out = []
+    print("RESULT\tregion\tlayer\tkind\tlevel_ft\tacres" + ("\tacres_clip" if mask else ""), flush=True)
+    with ProcessPoolExecutor(max_workers=workers or len(regions)) as pool:
+        futs = {pool.submit(measure_region, r, mask): r for r in regions}
+        for fut in as_completed(futs):
+            try: region, rows, hit = fut.result()
+            except Exception as e:
+                log(f"=== {futs[fut]}: FAILED: {e}"); continue
+            log(f"=== {region}: {len(rows)} layers{' (cached)' if hit else ''}")
+            for r in rows:
+                print(f"RESULT\t{r['region']}\t{r['layer']}\t{r['kind']}\t{r['level_ft']:.1f}\t{r['acres']:.1f}"
+                      + (f"\t{r['acres_clip']:.1f}" if mask else ""), flush=True)
+            out += rows
+    check_nesting(out)
+    return out
+
+# ---- combo (arithmetic only) --------------------------------------------------
+def from_tsv(paths):
+    """Layer areas from sweep.R / clip.R RESULT output instead of the cache."""
+    rows, clip = {}, {}
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                c = line.rstrip("\n").split("\t")
+                if c[0] != "RESULT" or c[1] == "region": continue
+                if len(c) == 6:        # sweep.R: region layer kind level acres
+                    rows[c[1], c[3], float(c[4])] = {"region": c[1], "layer": c[2], "kind": c[3],
+                                                     "level_ft": float(c[4]), "acres": float(c[5]), "acres_clip": None}
+                elif len(c) == 5:      # clip.R: region conn0|conn5|low5 mask acres
+                    t = parse_term(c[2])
+                    if c[3] != "none": clip[c[1], *t] = float(c[4])
+                    else: rows.setdefault((c[1], *t), {"region": c[1], "layer": c[2], "kind": t[0],
+                                                        "level_ft": t[1], "acres": float(c[4]), "acres_clip": None})
+    for k, v in clip.items():
+        if k in rows: rows[k]["acres_clip"] = v
+    return list(rows.values())
+
+def from_cache(regions=REGIONS):
+    """Newest cached areas per region (by file mtime)."""
+    rows = []
+    for r in regions:
+        hits = sorted(glob.glob(os.path.join(CACHE, f"{r}-*.parquet")), key=os.path.getmtime)
+        if hits: rows += pq.read_table(hits[-1]).to_pylist()
+    return rows
+
+def parse_term(t):
+    m = re.fullmatch(r"(conn|low)(\d+(?:\.\d+)?)", t)
+    if not m: raise ValueError(f"bad mask term {t!r} (want conn<ft> or low<ft>)")
+    return ("connected" if m[1] == "conn" else "lowlying"), float(m[2])
+
+TERM = r"[a-z]+\d+(?:\.\d+)?"
+
+def parse(expr):
+    """'conn5-conn0+low5' -> [(+1, 'connected', 5.0), (-1, 'connected', 0.0), (+1, 'lowlying', 5.0)].
+    Terms are joined by explicit + / -. Connected levels are nested, so the expression may
+    add one connected level (the top) and subtract one lower level from it; a repeated
+    term, a second positive connected level or any other subtraction is rejected rather
+    than silently mis-measured."""
+    e = expr.replace(" ", "")
+    if not re.fullmatch(rf"\+?{TERM}(?:[+-]{TERM})*", e): raise ValueError(f"bad mask expression {expr!r} (want e.g. conn5-conn0+low5)")
+    terms = [(-1 if s == "-" else 1, *parse_term(t)) for s, t in re.findall(rf"([+-]?)({TERM})", e)]
+    seen = set()
+    for _, k, lv in terms:
+        if (k, lv) in seen: raise ValueError(f"{expr}: {k} {lv} ft appears twice")
+        seen.add((k, lv))
+    top = max((lv for s, k, lv in terms if s > 0 and k == "connected"), default=None)
+    for s, k, lv in terms:
+        if s > 0 and k == "connected" and lv < top:
+            raise ValueError(f"{expr}: +{k} {lv} ft is already inside connected {top} ft")
+        if s < 0 and (k != "connected" or top is None or lv > top):
+            raise ValueError(f"{expr}: -{k} {lv} ft is not nested inside a larger connected level")
+    if sum(s < 0 for s, _, _ in terms) > 1:
+        raise ValueError(f"{expr}: the subtracted connected levels are nested in each other")
+    return terms
+
+def combo(rows, expr, clip=False):
+    """{region: acres, ..., 'CA': total} for a mask expression over the per-level areas."""
+    col = "acres_clip" if clip else "acres"
+    area, layer = {}, {}
+    for r in rows:
+        k = (r["region"], r["kind"], r["level_ft"])
+        if k in area: raise ValueError(f"{r['region']}: layers {layer[k]} and {r['layer']} are both {r['kind']} {r['level_ft']} ft")
+        area[k], layer[k] = r[col], r["layer"]
+    out = {}
+    for region in sorted({r["region"] for r in rows}, key=lambda r: (r not in REGIONS, REGIONS.index(r) if r in REGIONS else 0, r)):
+        vals = [(s, area.get((region, k, lv))) for s, k, lv in parse(expr)]
+        out[region] = None if any(v is None for _, v in vals) else sum(s * v for s, v in vals)
+    out["CA"] = None if any(v is None for v in out.values()) else sum(out.values())
+    return out
+
+def check_nesting(rows):
+    """Warn where a region's connected area shrinks with level — the arithmetic assumes it can't."""
+    ok = True
+    for region in sorted({r["region"] for r in rows}):
+        conn = sorted((r["level_ft"], r["acres"]) for r in rows if r["region"] == region and r["kind"] == "connected")
+        bad = [f"{a[0]}->{b[0]} ft" for a, b in zip(conn, conn[1:]) if b[1] < a[1]]
+        if bad: ok = False; log(f"  {region}: connected area not monotonic at {', '.join(bad)}")
+    return ok
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("measure", help="measure every layer (cached per source zip)")
+    m.add_argument("--regions", nargs="+", default=list(REGIONS))
+    m.add_argument("--workers", type=int)
+    m.add_argument("--mask", help="GeoJSON land mask; also record each layer's clipped area")
+    c = sub.add_parser("combo", help="evaluate mask expressions on cached areas")
+    c.add_argument("exprs", nargs="+")
+    c.add_argument("--clip", action="store_true", help="use the areas inside the --mask used by measure")
+    c.add_argument("--tsv", nargs="+", help="read sweep.R / clip.R RESULT files instead of the cache")
+    a = ap.parse_args(argv)
+    if a.cmd == "measure":
+        measure(a.regions, a.workers, a.mask); return
+    rows = from_tsv(a.tsv) if a.tsv else from_cache()
+    if not rows: sys.exit(f"no cached areas in {CACHE}: run `sweep.py measure` or pass --tsv")
+    check_nesting(rows)
+    print("RESULT\tmask\tregion\tacres\tvs_target")
+    for expr in a.exprs:
+        try: res = combo(rows, expr, a.clip)
+        except ValueError as e: sys.exit(str(e))
+        for region, v in res.items():
+            vs = f"{100 * (v - TARGET) / TARGET:+.1f}%" if region == "CA" and v is not None else ""
+            print(f"RESULT\t{expr}{' ∩ CA' if a.clip else ''}\t{region}\t{'NA' if v is None else f'{v:.1f}'}\t{vs}")
+
+if __name__ == "__main__":
+    main()